@@ -0,0 +1,280 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+import telemetry
+from cache import cache_stats
+from mastermind import MastermindGame, Player, seed_game
+from settings import game_settings
+
+try:
+    import resource
+except ImportError:
+    # resource is Unix only, peak memory is then not reported
+    resource = None
+
+# Agent attributes holding the set of codes still consistent with the feedback
+CANDIDATE_ATTRIBUTES = ['remaining_guesses']
+
+
+def candidate_count(agent):
+    """
+    Returns the size of the agent's candidate set, if it keeps one.
+
+    :param agent: the MastermindAgent
+    :return: number of remaining candidate codes, None if the agent has no candidate set
+    """
+    for attribute in CANDIDATE_ATTRIBUTES:
+        if hasattr(agent, attribute):
+            candidates = getattr(agent, attribute)
+            if candidates is None:
+                # Streaming agents hold no candidates before their first filter, every code is still one
+                return agent.feedback_table.num_codes if hasattr(agent, 'feedback_table') else None
+            return len(candidates)
+    return None
+
+
+def peak_memory_kb():
+    """
+    Returns the peak resident memory of this process. The peak never goes down, so when several
+    agents are benchmarked in one run each agent's figure includes the agents before it.
+
+    :return: peak resident set size in kilobytes, None where it cannot be measured
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def percentiles(values):
+    """
+    Summarises latencies by their percentiles.
+
+    :param values: list of latencies in seconds
+    :return: dictionary of p50, p95, p99, max and mean latencies
+    """
+    if len(values) == 0:
+        return {}
+    values = np.asarray(values)
+    summary = {"p%d" % p: float(np.percentile(values, p)) for p in [50, 95, 99]}
+    summary["max"] = float(np.max(values))
+    summary["mean"] = float(np.mean(values))
+    return summary
+
+
+class TimedAgent:
+    """
+    A wrapper around an agent that records the latency and the candidate-set size of every turn.
+
+    ...
+
+    Attributes
+    ----------
+    agent : MastermindAgent
+        the wrapped agent
+    turns : list of dict
+        one record per AgentFunction call, with the turn number, latency and candidate count
+
+    Methods
+    -------
+    AgentFunction(percepts)
+        Times the wrapped agent's AgentFunction
+    """
+
+    def __init__(self, agent):
+        """
+        :param agent: the agent to wrap
+        """
+        self.agent = agent
+        self.turns = []
+
+    def AgentFunction(self, percepts):
+        """
+        Times the wrapped agent's AgentFunction.
+
+        :param percepts: the percepts passed on to the agent
+        :return: the agent's guess
+        """
+        start = time.perf_counter()
+        actions = self.agent.AgentFunction(percepts)
+        latency = time.perf_counter() - start
+        self.turns.append({"turn": percepts[0], "latency": latency, "candidates": candidate_count(self.agent)})
+        return actions
+
+
+def benchmark_agent(agentFile, code_length, num_colours, num_guesses, num_games, seed):
+    """
+    Plays num_games headless games with an agent and records per-game and per-turn statistics.
+
+    :param agentFile: name of the agent file
+    :param code_length: the length of the code to guess
+    :param num_colours: the number of colours
+    :param num_guesses: max. number of guesses per game
+    :param num_games: total number of games played
+    :param seed: seed for the targets, the same seed gives every agent the same targets
+    :return: a tuple (report, turns), where report is a dictionary of summary statistics and
+             turns is a list of per-turn records
+    """
+    game = MastermindGame(code_length=code_length, num_colours=num_colours, verbose=False, sink=telemetry.NullSink())
+    targets, game_seeds = game.draw_games(np.random.RandomState(seed), num_games)
+    colours = np.array(game.colours)
+
+    # Agents print progress every turn, which a headless run discards
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        player = Player(playerFile=agentFile, code_length=code_length, colours=list(game.colours),
+                        num_guesses=num_guesses)
+        setup_time = time.perf_counter() - start
+
+        timed_agent = TimedAgent(player.agent)
+        player.agent = timed_agent
+
+        scores = []
+        guess_counts = []
+        game_times = []
+        turns = []
+        for game_index, (target, game_seed) in enumerate(zip(targets, game_seeds)):
+            seed_game(game_seed)
+            timed_agent.turns = []
+            start = time.perf_counter()
+            scores.append(game.play(player, target=colours[target], num_guesses=num_guesses))
+            game_times.append(time.perf_counter() - start)
+            guess_counts.append(len(timed_agent.turns))
+            for record in timed_agent.turns:
+                turns.append(dict(record, agent=agentFile, game=game_index))
+
+    latencies_by_turn = {}
+    candidates_by_turn = {}
+    for record in turns:
+        latencies_by_turn.setdefault(record["turn"], []).append(record["latency"])
+        if record["candidates"] is not None:
+            candidates_by_turn.setdefault(record["turn"], []).append(record["candidates"])
+
+    report = {
+        "agent": agentFile,
+        "games": num_games,
+        "seed": seed,
+        "setup_time": setup_time,
+        "total_time": float(np.sum(game_times)),
+        "average_score": float(np.mean(scores)),
+        "average_guesses": float(np.mean(guess_counts)),
+        "worst_guesses": int(np.max(guess_counts)),
+        "score_occurrences": {int(s): int(n) for s, n in zip(*np.unique(scores, return_counts=True))},
+        "latency": percentiles([record["latency"] for record in turns]),
+        "latency_by_turn": {int(t): percentiles(v) for t, v in sorted(latencies_by_turn.items())},
+        "mean_candidates_by_turn": {int(t): float(np.mean(v)) for t, v in sorted(candidates_by_turn.items())},
+        "caches": cache_stats(timed_agent.agent),
+        "peak_memory_kb": peak_memory_kb(),
+        "scores": [int(s) for s in scores],
+        "guess_counts": guess_counts,
+    }
+    return report, turns
+
+
+def exhaustive_report(agentFile, code_length, num_colours, num_guesses, num_workers):
+    """
+    Plays an agent once against every possible target, for exact and seed-independent statistics.
+
+    :param agentFile: name of the agent file
+    :param code_length: the length of the code to guess
+    :param num_colours: the number of colours
+    :param num_guesses: max. number of guesses per game
+    :param num_workers: number of worker processes
+    :return: a dictionary of summary statistics
+    """
+    game = MastermindGame(code_length=code_length, num_colours=num_colours, verbose=False, sink=telemetry.NullSink())
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        scores = game.run_exhaustive(agentFile=agentFile, num_guesses=num_guesses, num_workers=num_workers)
+        total_time = time.perf_counter() - start
+
+    return {
+        "agent": agentFile,
+        "exhaustive": True,
+        "games": len(scores),
+        "total_time": total_time,
+        "average_score": float(np.mean(scores)),
+        "worst_score": int(np.max(scores)),
+        "unsolved": int(np.sum(scores > num_guesses)),
+        "score_occurrences": {int(s): int(n) for s, n in zip(*np.unique(scores, return_counts=True))},
+        "caches": game.caches,
+        "peak_memory_kb": peak_memory_kb(),
+    }
+
+
+def print_caches(caches):
+    """
+    Prints the hit rate of every cache an agent looked up.
+
+    :param caches: dictionary of cache statistics by cache name, as reported
+    """
+    for name, stats in caches.items():
+        if stats["hits"] + stats["misses"] > 0:
+            print("  %s hit rate %.1f%% (%d hits, %d misses)" % (name, stats["hit_rate"] * 100, stats["hits"],
+                                                              stats["misses"]))
+
+
+def write_turns_csv(path, turns):
+    """
+    Writes per-turn records as CSV.
+
+    :param path: path of the CSV file
+    :param turns: list of per-turn records
+    """
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=["agent", "game", "turn", "latency", "candidates"])
+        writer.writeheader()
+        for record in turns:
+            writer.writerow(record)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Mastermind agents on identical targets.")
+    parser.add_argument("agents", nargs="+", help="agent files, e.g. my_agent.py minimax_agent.py")
+    parser.add_argument("--games", type=int, default=game_settings['totalNumberOfGames'])
+    parser.add_argument("--seed", type=int, default=game_settings['seed'] if game_settings['seed'] is not None else 0)
+    parser.add_argument("--json", default="benchmark.json", help="path of the JSON report")
+    parser.add_argument("--csv", default=None, help="path of the per-turn CSV, none if omitted")
+    parser.add_argument("--exhaustive", action="store_true", help="play every possible target once instead of --games")
+    parser.add_argument("--workers", type=int, default=game_settings['numberOfWorkers'],
+                        help="worker processes for --exhaustive")
+    args = parser.parse_args()
+
+    reports = []
+    all_turns = []
+    for agentFile in args.agents:
+        if args.exhaustive:
+            report = exhaustive_report(agentFile, code_length=game_settings['codeLength'],
+                                       num_colours=game_settings['numberOfColours'],
+                                       num_guesses=game_settings['maxNumberOfGuesses'], num_workers=args.workers)
+            reports.append(report)
+            print("%s: exact average score %.4f over %d targets, worst %d" % (
+                agentFile, report["average_score"], report["games"], report["worst_score"]))
+            print_caches(report["caches"])
+            continue
+
+        report, turns = benchmark_agent(agentFile, code_length=game_settings['codeLength'],
+                                        num_colours=game_settings['numberOfColours'],
+                                        num_guesses=game_settings['maxNumberOfGuesses'],
+                                        num_games=args.games, seed=args.seed)
+        reports.append(report)
+        all_turns.extend(turns)
+        print("%s: average score %.3f, worst %d guesses, p95 turn latency %.2f ms" % (
+            agentFile, report["average_score"], report["worst_guesses"], report["latency"]["p95"] * 1000))
+        print_caches(report["caches"])
+
+    with open(args.json, 'w') as f:
+        json.dump({"code_length": game_settings['codeLength'], "num_colours": game_settings['numberOfColours'],
+                   "max_guesses": game_settings['maxNumberOfGuesses'], "agents": reports}, f, indent=2)
+
+    if args.csv is not None:
+        write_turns_csv(args.csv, all_turns)
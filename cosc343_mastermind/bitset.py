@@ -0,0 +1,110 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import collections
+
+import numpy as np
+
+from feedback import num_feedbacks
+
+# Candidate sets holding fewer than this fraction of the codes are cheaper to filter code by code
+# than by ANDing bitsets over the whole code space
+MIN_BITSET_DENSITY = 1 / 16
+
+def mask_to_bitset(mask):
+    """
+    Packs a boolean mask over the code index space into a bitset, bit i standing for code i.
+
+    :param mask: a (..., N) boolean array
+    :return: a (..., ceil(N / 8)) uint8 array
+    """
+    return np.packbits(mask, axis=-1, bitorder='little')
+
+
+def to_bitset(indices, size):
+    """
+    Builds the bitset of a set of code indices.
+
+    :param indices: array of code indices
+    :param size: the number of codes in the index space
+    :return: a (ceil(size / 8),) uint8 array
+    """
+    mask = np.zeros(size, dtype=bool)
+    mask[indices] = True
+    return mask_to_bitset(mask)
+
+
+def bitset_indices(bits, size):
+    """
+    Lists the code indices in a bitset.
+
+    :param bits: a (ceil(size / 8),) uint8 array
+    :param size: the number of codes in the index space
+    :return: int32 array of code indices in increasing order
+    """
+    return np.flatnonzero(np.unpackbits(bits, count=size, bitorder='little')).astype(np.int32)
+
+
+class PartitionIndex:
+    """
+    Bitsets of the codes giving each feedback to a guess, kept for the most recently used guesses.
+
+    ...
+
+    Attributes
+    ----------
+    feedback_table : FeedbackTable
+        the feedback table of the game configuration
+    max_guesses : int
+        the number of guesses whose partitions are kept, least recently used ones are dropped first
+    partitions : OrderedDict
+        maps a guess index to a (num_feedbacks, ceil(N / 8)) uint8 array of bitsets
+
+    Methods
+    -------
+    index(guess)
+        Returns the partition bitsets of a guess, building them if needed
+    partition(guess, feedback)
+        Returns the bitset of codes giving a feedback to a guess
+    """
+
+    def __init__(self, feedback_table, max_guesses):
+        """
+        :param feedback_table: the feedback table of the game configuration
+        :param max_guesses: the number of guesses whose partitions are kept
+        """
+        self.feedback_table = feedback_table
+        self.max_guesses = max_guesses
+        self.partitions = collections.OrderedDict()
+
+    def index(self, guess):
+        """
+        Returns the partition bitsets of a guess, building them and evicting the least recently
+        used guess if needed.
+
+        :param guess: index of the guess
+        :return: a (num_feedbacks, ceil(N / 8)) uint8 array, row f holds the codes giving feedback f
+        """
+        guess = int(guess)
+        if guess in self.partitions:
+            self.partitions.move_to_end(guess)
+            return self.partitions[guess]
+
+        feedback = self.feedback_table.row(guess)
+        feedbacks = np.arange(num_feedbacks(self.feedback_table.code_length), dtype=np.uint8)
+        bits = mask_to_bitset(feedback[None, :] == feedbacks[:, None])
+        self.partitions[guess] = bits
+        if len(self.partitions) > self.max_guesses:
+            self.partitions.popitem(last=False)
+        return bits
+
+    def partition(self, guess, feedback):
+        """
+        Returns the bitset of codes giving a feedback to a guess.
+
+        :param guess: index of the guess
+        :param feedback: the encoded feedback
+        :return: a (ceil(N / 8),) uint8 array
+        """
+        return self.index(guess)[feedback]
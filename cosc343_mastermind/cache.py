@@ -0,0 +1,150 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import collections
+import os
+
+# The caches of an agent whose statistics are reported, by the attribute path leading to them
+CACHE_ATTRIBUTES = {'decision_cache': ('decision_cache',), 'lookahead_memo': ('lookahead', 'memo')}
+
+
+def atomic_save(path, write, mode='wb'):
+    """
+    Writes a cache file under a temporary name first and then renames it, so other processes never
+    load a half-written file. The directory of the file is created if needed.
+
+    :param path: path of the file
+    :param write: function writing the contents to an open file
+    :param mode: 'wb' for binary files, 'w' for text files
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp_path, mode) as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class LRUCache:
+    """
+    A bounded dictionary dropping the least recently used entries first, counting its hits and misses.
+
+    ...
+
+    Attributes
+    ----------
+    max_entries : int
+        the number of entries kept, 0 to keep none
+    entries : OrderedDict
+        the cached values, least recently used first
+    hits : int
+        the number of lookups found in the cache
+    misses : int
+        the number of lookups not found in the cache
+
+    Methods
+    -------
+    get(key)
+        Returns the cached value of a key, None if it is not kept
+    put(key, value)
+        Caches the value of a key
+    hit_rate()
+        Returns the fraction of lookups found in the cache
+    stats()
+        Returns the entry, hit and miss counts and the hit rate
+    """
+
+    def __init__(self, max_entries):
+        """
+        :param max_entries: the number of entries kept, 0 to keep none
+        """
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Returns the cached value of a key.
+
+        :param key: a hashable key
+        :return: the cached value, None if the key is not kept
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """
+        Caches the value of a key, evicting the least recently used entry if needed.
+
+        :param key: a hashable key
+        :param value: the value, not None
+        """
+        if self.max_entries <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self):
+        """
+        Returns the fraction of lookups found in the cache.
+
+        :return: hits / (hits + misses), 0 before any lookup
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        Returns the entry, hit and miss counts and the hit rate of the cache.
+
+        :return: a dictionary with 'entries', 'hits', 'misses' and 'hit_rate'
+        """
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate()}
+
+
+def cache_stats(agent):
+    """
+    Returns the statistics of the caches an agent keeps.
+
+    :param agent: the agent
+    :return: a dictionary of LRUCache.stats() by the names of CACHE_ATTRIBUTES, empty if the agent keeps none
+    """
+    stats = {}
+    for name, path in CACHE_ATTRIBUTES.items():
+        cache = agent
+        for attribute in path:
+            cache = getattr(cache, attribute, None)
+        if isinstance(cache, LRUCache):
+            stats[name] = cache.stats()
+    return stats
+
+
+def merge_cache_stats(all_stats):
+    """
+    Adds up the cache statistics of agents playing parts of the same run.
+
+    :param all_stats: list of cache_stats() dictionaries
+    :return: a dictionary of the summed statistics by cache name, with the hit rates of the sums
+    """
+    merged = {}
+    for stats in all_stats:
+        for name, counts in stats.items():
+            total = merged.setdefault(name, {'entries': 0, 'hits': 0, 'misses': 0})
+            for key in total:
+                total[key] += counts[key]
+    for total in merged.values():
+        lookups = total['hits'] + total['misses']
+        total['hit_rate'] = total['hits'] / lookups if lookups else 0.0
+    return merged
@@ -0,0 +1,170 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import os
+
+import numpy as np
+
+from cache import atomic_save
+from feedback import encode_feedback, num_feedbacks
+
+
+class DecisionTree:
+    """
+    A strategy expanded over every secret code: each node holds the guess to play and
+    the child node to go to for each feedback.
+
+    ...
+
+    Attributes
+    ----------
+    code_length: int
+        the length of the code
+    num_colours: int
+        the number of colours
+    guesses : numpy array
+        a (num_nodes,) int32 array, the code index guessed at each node; node 0 is the root
+    children : numpy array
+        a (num_nodes, num_feedbacks) int32 array, the next node for each encoded feedback, -1 when the
+        feedback solves the game or cannot occur
+
+    Methods
+    -------
+    next_node(node, feedback)
+        Returns the node reached from a node after an encoded feedback
+    guess_counts(feedback_table)
+        Returns the number of guesses the tree takes to solve each secret
+    save(path)
+        Saves the tree as a compressed .npz file
+    """
+
+    def __init__(self, code_length, num_colours, guesses, children):
+        """
+        :param code_length: the length of the code
+        :param num_colours: the number of colours
+        :param guesses: the code index guessed at each node
+        :param children: the next node for each node and encoded feedback
+        """
+        self.code_length = code_length
+        self.num_colours = num_colours
+        self.guesses = np.asarray(guesses, dtype=np.int32)
+        self.children = np.asarray(children, dtype=np.int32)
+
+    def next_node(self, node, feedback):
+        """
+        Returns the node reached from a node after an encoded feedback.
+
+        :param node: the current node
+        :param feedback: the encoded feedback to the node's guess
+        :return: the next node, -1 if the feedback solved the game or cannot occur
+        """
+        return self.children[node, feedback]
+
+    def guess_counts(self, feedback_table):
+        """
+        Walks every secret down the tree at once and counts the guesses it takes.
+
+        :param feedback_table: the feedback table of the game configuration
+        :return: a (num_codes,) array, the number of guesses needed for each secret
+        """
+        solved = encode_feedback(self.code_length, 0, self.code_length)
+        secrets = np.arange(feedback_table.num_codes)
+        nodes = np.zeros(len(secrets), dtype=np.int64)
+        counts = np.zeros(len(secrets), dtype=np.int64)
+        active = np.ones(len(secrets), dtype=bool)
+        while np.any(active):
+            counts[active] += 1
+            feedback = feedback_table.pairs(self.guesses[nodes[active]], secrets[active])
+            next_nodes = self.children[nodes[active], feedback]
+            still_active = feedback != solved
+            if np.any(next_nodes[still_active] < 0):
+                raise RuntimeError("Error! Decision tree has no node for a feedback it can receive")
+            index = np.flatnonzero(active)
+            nodes[index] = next_nodes
+            active[index[~still_active]] = False
+        return counts
+
+    def save(self, path):
+        """
+        Saves the tree as a compressed .npz file.
+
+        :param path: path of the file
+        """
+        atomic_save(path, lambda f: np.savez_compressed(f, code_length=self.code_length, num_colours=self.num_colours,
+                                                        guesses=self.guesses, children=self.children))
+
+
+def load_tree(path):
+    """
+    Loads a tree saved with DecisionTree.save.
+
+    :param path: path of the file
+    :return: the DecisionTree
+    """
+    with np.load(path) as data:
+        return DecisionTree(int(data['code_length']), int(data['num_colours']), data['guesses'], data['children'])
+
+
+def compile_tree(feedback_table, choose_guess, first_guess):
+    """
+    Expands a deterministic strategy over every secret code.
+
+    :param feedback_table: the feedback table of the game configuration
+    :param choose_guess: function mapping an array of candidate indices to the index of the guess to play
+    :param first_guess: index of the opening guess
+    :return: the compiled DecisionTree
+    """
+    code_length = feedback_table.code_length
+    solved = encode_feedback(code_length, 0, code_length)
+
+    guesses = [first_guess]
+    children = [np.full(num_feedbacks(code_length), -1, dtype=np.int32)]
+    pending = [(0, np.arange(feedback_table.num_codes))]
+    while pending:
+        node, candidates = pending.pop()
+        feedback = feedback_table.row(guesses[node], candidates)
+        for f in np.unique(feedback):
+            if f == solved:
+                continue
+            partition = candidates[feedback == f]
+            if len(partition) == len(candidates):
+                raise RuntimeError("Error! Strategy guessed a code that does not split the remaining candidates")
+            children[node][f] = len(guesses)
+            guesses.append(choose_guess(partition))
+            children.append(np.full(num_feedbacks(code_length), -1, dtype=np.int32))
+            pending.append((children[node][f], partition))
+
+    return DecisionTree(code_length, feedback_table.num_colours, guesses, np.array(children))
+
+
+def tree_cache_path(cache_dir, code_length, num_colours, first_guess, name):
+    """
+    Returns the path of a cached tree, keyed by configuration, opening guess and strategy.
+
+    :param cache_dir: directory of the on-disk cache
+    :param code_length: the length of the code
+    :param num_colours: the number of colours
+    :param first_guess: index of the opening guess
+    :param name: name of the strategy
+    :return: path of the .npz file
+    """
+    return os.path.join(cache_dir, "tree_%dx%d_%d_%s.npz" % (code_length, num_colours, first_guess, name))
+
+
+if __name__ == "__main__":
+    from first_guess import opening_guess
+    from my_agent import MastermindAgent
+    from settings import game_settings
+
+    colours = ['B', 'R', 'G', 'Y', 'P', 'C'][:game_settings['numberOfColours']]
+    agent = MastermindAgent(code_length=game_settings['codeLength'], colours=colours,
+                            num_guesses=game_settings['maxNumberOfGuesses'])
+    first_guess = opening_guess(agent.code_length, colours)
+    tree = compile_tree(agent.feedback_table, agent.choose_guess, first_guess)
+
+    counts = tree.guess_counts(agent.feedback_table)
+    print("Nodes:", len(tree.guesses))
+    print("Average guesses: %.4f" % np.mean(counts))
+    print("Worst case guesses: %d" % np.max(counts))
+    print("Guess count occurrences:", {int(c): int(n) for c, n in zip(*np.unique(counts, return_counts=True))})
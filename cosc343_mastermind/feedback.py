@@ -0,0 +1,573 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import os
+
+import numpy as np
+
+import profiling
+from cache import atomic_save
+from settings import game_settings
+
+# Number of guesses scored against all codes at once when building a feedback table.
+TABLE_BLOCK_SIZE = 256
+
+# Upper bound on the number of guess x code feedback bytes scored at once by partition_counts.
+PARTITION_BLOCK_ELEMENTS = 2 ** 22
+
+# Largest code space for which the all-pairs table is built (16384 codes is a 256 MB table).
+# Bigger configurations compute feedback rows on demand instead.
+MAX_TABLE_CODES = 2 ** 14
+
+# Largest code space for which FeedbackTable keeps the code and colour count matrices.
+# Bigger configurations decode codes from their indices when needed.
+MAX_STORED_CODES = 2 ** 22
+
+# Code spaces and feedback tables built in this process, by (code_length, num_colours). Every agent of a
+# configuration shares them, so they are built once however many players, games or agents there are.
+_code_spaces = {}
+_feedback_tables = {}
+
+
+def num_codes(code_length, num_colours):
+    """
+    Returns the number of distinct codes for a game configuration.
+
+    :param code_length: the length of the code
+    :param num_colours: the number of colours
+    :return: num_colours ** code_length
+    """
+    return num_colours ** code_length
+
+
+def num_feedbacks(code_length):
+    """
+    Returns the size of the encoded feedback space, i.e. one more than the largest feedback byte.
+
+    :param code_length: the length of the code
+    :return: (code_length + 1) ** 2
+    """
+    return (code_length + 1) ** 2
+
+
+def feedbacks_per_total(code_length):
+    """
+    Counts the feedbacks with each total number of matching pegs, in_place + in_colour. Every total t
+    can be split t + 1 ways, except that code_length matches cannot have code_length - 1 in place.
+
+    :param code_length: the length of the code
+    :return: a (code_length + 1,) int64 array
+    """
+    splits = np.arange(1, code_length + 2, dtype=np.int64)
+    splits[code_length] = code_length
+    return splits
+
+
+def encode_feedback(in_place, in_colour, code_length):
+    """
+    Packs an (in_place, in_colour) pair into a single byte.
+
+    :param in_place: the number of correct colours in place
+    :param in_colour: the number of correct colours out of place
+    :param code_length: the length of the code
+    :return: in_place * (code_length + 1) + in_colour
+    """
+    return in_place * (code_length + 1) + in_colour
+
+
+def decode_feedback(feedback, code_length):
+    """
+    Unpacks a feedback byte into an (in_place, in_colour) pair.
+
+    :param feedback: the encoded feedback
+    :param code_length: the length of the code
+    :return: a tuple (in_place, in_colour)
+    """
+    return divmod(int(feedback), code_length + 1)
+
+
+def all_codes(code_length, num_colours):
+    """
+    Generates every code as a row of colour indices.
+
+    Row i holds the base-num_colours digits of i (most significant first), so the row order
+    matches itertools.product(colours, repeat=code_length).
+
+    :param code_length: the length of the code
+    :param num_colours: the number of colours
+    :return: a (num_codes, code_length) uint8 array
+    """
+    return codes_from_indices(np.arange(num_codes(code_length, num_colours)), code_length, num_colours)
+
+
+def codes_from_indices(indices, code_length, num_colours):
+    """
+    Decodes code indices into rows of colour indices.
+
+    :param indices: array of code indices
+    :param code_length: the length of the code
+    :param num_colours: the number of colours
+    :return: a (len(indices), code_length) uint8 array
+    """
+    powers = num_colours ** np.arange(code_length - 1, -1, -1, dtype=np.int64)
+    return ((np.asarray(indices, dtype=np.int64)[:, None] // powers) % num_colours).astype(np.uint8)
+
+
+def code_indices(codes, num_colours):
+    """
+    Encodes rows of colour indices back into code indices, the inverse of codes_from_indices.
+
+    :param codes: a (N, code_length) array of colour indices
+    :param num_colours: the number of colours
+    :return: int64 array of code indices
+    """
+    powers = num_colours ** np.arange(codes.shape[1] - 1, -1, -1, dtype=np.int64)
+    return codes.astype(np.int64) @ powers
+
+
+def code_chunks(code_length, num_colours, chunk_size):
+    """
+    Generates the code space lazily in fixed-size chunks, in index order.
+
+    :param code_length: the length of the code
+    :param num_colours: the number of colours
+    :param chunk_size: the number of codes per chunk
+    :return: a generator of (indices, codes) tuples, codes being a (len(indices), code_length) uint8 array
+    """
+    n = num_codes(code_length, num_colours)
+    for start in range(0, n, chunk_size):
+        indices = np.arange(start, min(start + chunk_size, n), dtype=np.int64)
+        yield indices, codes_from_indices(indices, code_length, num_colours)
+
+
+def stream_consistent(code_length, num_colours, history, chunk_size):
+    """
+    Finds the codes consistent with a guess history without materialising the code space:
+    each chunk is filtered against every guess and only its survivors are kept.
+
+    :param code_length: the length of the code
+    :param num_colours: the number of colours
+    :param history: list of (guess index, encoded feedback) tuples
+    :param chunk_size: the number of codes per chunk
+    :return: int64 array of the indices of consistent codes
+    """
+    guesses = codes_from_indices([guess for guess, _ in history], code_length, num_colours)
+    survivors = []
+    for indices, codes in code_chunks(code_length, num_colours, chunk_size):
+        for guess, (_, feedback) in zip(guesses, history):
+            mask = feedback_against(guess, codes, num_colours) == feedback
+            indices = indices[mask]
+            codes = codes[mask]
+        survivors.append(indices)
+    return np.concatenate(survivors)
+
+
+def code_to_array(code, colours):
+    """
+    Converts a code of colour characters to a row of colour indices.
+
+    :param code: a string, list or numpy array of colour characters
+    :param colours: list of characters representing available colours
+    :return: a (code_length,) uint8 array
+    """
+    return np.array([colours.index(c) for c in code], dtype=np.uint8)
+
+
+def code_to_index(code, colours):
+    """
+    Converts a code of colour characters to its index in the all_codes ordering.
+
+    :param code: a string, list or numpy array of colour characters
+    :param colours: list of characters representing available colours
+    :return: the integer index of the code
+    """
+    index = 0
+    for c in code:
+        index = index * len(colours) + colours.index(c)
+    return index
+
+
+def index_to_code(index, colours, code_length):
+    """
+    Converts a code index back to a list of colour characters.
+
+    :param index: the integer index of the code
+    :param colours: list of characters representing available colours
+    :param code_length: the length of the code
+    :return: list of colour characters
+    """
+    code = []
+    for _ in range(code_length):
+        index, digit = divmod(int(index), len(colours))
+        code.append(colours[digit])
+    return code[::-1]
+
+
+def colour_counts(codes, num_colours):
+    """
+    Counts how many times each colour appears in each code.
+
+    :param codes: a (N, code_length) array of colour indices
+    :param num_colours: the number of colours
+    :return: a (N, num_colours) uint8 array
+    """
+    codes = np.asarray(codes)
+    return (codes[..., None] == np.arange(num_colours)).sum(axis=-2).astype(np.uint8)
+
+
+def feedback_block(guesses, codes, guess_counts, code_counts):
+    """
+    Scores a block of guesses against a set of codes.
+
+    :param guesses: a (G, code_length) array of colour indices
+    :param codes: a (N, code_length) array of colour indices
+    :param guess_counts: the colour_counts of guesses
+    :param code_counts: the colour_counts of codes
+    :return: a (G, N) uint8 array of encoded feedback
+    """
+    profiling.count('feedback_evaluations', len(guesses) * len(codes))
+    code_length = codes.shape[1]
+    feedback = np.zeros((len(guesses), len(codes)), dtype=np.uint8)
+    # Accumulate one position / one colour at a time to keep the scratch arrays 2-D
+    for position in range(code_length):
+        feedback += guesses[:, position, None] == codes[None, :, position]
+    feedback *= np.uint8(code_length)
+    for colour in range(guess_counts.shape[1]):
+        feedback += np.minimum(guess_counts[:, colour, None], code_counts[None, :, colour])
+    return feedback
+
+
+def total_matches(guess_counts, code_counts):
+    """
+    Counts the matching pegs, in place or not, between guesses and codes. This only depends on the
+    colour counts, so it is a coarser and cheaper partition than the feedback.
+
+    :param guess_counts: a (G, num_colours) array, the colour_counts of guesses
+    :param code_counts: a (N, num_colours) array, the colour_counts of codes
+    :return: a (G, N) uint8 array
+    """
+    totals = np.zeros((len(guess_counts), len(code_counts)), dtype=np.uint8)
+    for colour in range(guess_counts.shape[1]):
+        totals += np.minimum(guess_counts[:, colour, None], code_counts[None, :, colour])
+    return totals
+
+
+def feedback_against(guess, codes, num_colours, code_counts=None):
+    """
+    Scores a single guess against a set of codes in one vectorized pass.
+
+    :param guess: a (code_length,) array of colour indices
+    :param codes: a (N, code_length) array of colour indices
+    :param num_colours: the number of colours
+    :param code_counts: the colour_counts of codes, computed if None
+    :return: a (N,) uint8 array of encoded feedback
+    """
+    guess = np.asarray(guess)
+    codes = np.asarray(codes)
+    if code_counts is None:
+        code_counts = colour_counts(codes, num_colours)
+    guess_counts = np.bincount(guess, minlength=num_colours).astype(np.uint8)
+    return feedback_block(guess[None, :], codes, guess_counts[None, :], code_counts)[0]
+
+
+def consistent_mask(codes, guess, in_place, in_colour, num_colours, code_counts=None):
+    """
+    Finds the codes that would have given the observed feedback for a guess.
+
+    :param codes: a (N, code_length) array of colour indices
+    :param guess: a (code_length,) array of colour indices
+    :param in_place: in-place count from the feedback
+    :param in_colour: in-colour count from the feedback
+    :param num_colours: the number of colours
+    :param code_counts: the colour_counts of codes, computed if None
+    :return: a (N,) boolean mask of codes consistent with the feedback
+    """
+    code_length = np.shape(codes)[1]
+    feedback = feedback_against(guess, codes, num_colours, code_counts)
+    return feedback == encode_feedback(in_place, in_colour, code_length)
+
+
+def partition_entropy(counts):
+    """
+    Calculates the Shannon entropy of feedback partitions.
+
+    :param counts: a (..., num_feedbacks) array of partition sizes
+    :return: an array of entropies in bits, one per partition histogram
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    probabilities = counts / counts.sum(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(counts > 0, probabilities * np.log2(probabilities), 0.0)
+    return -terms.sum(axis=-1)
+
+
+def read_only(array):
+    """
+    Marks an array read-only, so that an agent modifying a shared array fails instead of corrupting
+    the other agents' state.
+
+    :param array: numpy array, or None
+    :return: the same array
+    """
+    if array is not None:
+        array.setflags(write=False)
+    return array
+
+
+def shared_code_space(code_length, num_colours):
+    """
+    Returns the code space of a configuration, built on first use and shared by the whole process.
+    The arrays are read-only: filtering must build new arrays rather than modify them.
+
+    :param code_length: the length of the code
+    :param num_colours: the number of colours
+    :return: a tuple (indices, codes, counts) of the int32 index of every code, the (N, code_length) uint8
+             codes and their (N, num_colours) uint8 colour counts, all None above MAX_STORED_CODES codes
+    """
+    key = (code_length, num_colours)
+    if key not in _code_spaces:
+        n = num_codes(code_length, num_colours)
+        if n > MAX_STORED_CODES:
+            _code_spaces[key] = (None, None, None)
+        else:
+            codes = all_codes(code_length, num_colours)
+            _code_spaces[key] = (read_only(np.arange(n, dtype=np.int32)), read_only(codes),
+                                 read_only(colour_counts(codes, num_colours)))
+    return _code_spaces[key]
+
+
+def shared_feedback_table(code_length, num_colours, cache_dir=None):
+    """
+    Returns the feedback table of a configuration, built (or loaded from cache_dir) on first use and
+    shared by the whole process.
+
+    :param code_length: the length of the code
+    :param num_colours: the number of colours
+    :param cache_dir: directory of the on-disk table cache, None to build in memory
+    :return: the FeedbackTable, whose arrays are read-only
+    """
+    key = (code_length, num_colours)
+    if key not in _feedback_tables:
+        _feedback_tables[key] = FeedbackTable(code_length, num_colours, cache_dir)
+    return _feedback_tables[key]
+
+
+class FeedbackTable:
+    """
+    A precomputed table of the feedback between every pair of codes.
+
+    Configurations with more than MAX_TABLE_CODES codes do not build the table; lookups
+    are then scored on demand from the code matrix. Above the streamingThreshold setting, where
+    agents generate the code space in chunks, the code matrix is not kept either and codes are
+    decoded from their indices.
+
+    When a cache directory is given the table is saved there once per configuration and
+    memory-mapped read-only on later runs, so processes share the same pages. Within a process,
+    shared_feedback_table hands every agent the same table.
+
+    ...
+
+    Attributes
+    ----------
+    code_length: int
+        the length of the code
+    num_colours: int
+        the number of colours
+    num_codes: int
+        the number of codes N
+    codes: numpy array or None
+        a (N, code_length) uint8 array of all codes in index order
+    counts: numpy array or None
+        a (N, num_colours) uint8 array of colour counts of all codes
+    table: numpy array or None
+        a (N, N) uint8 array, table[g, s] is the encoded feedback of guess g against secret s
+
+    Methods
+    -------
+    code_rows(indices)
+        Returns the codes with the given indices
+    count_rows(indices)
+        Returns the colour counts of the codes with the given indices
+    cache_path(cache_dir)
+        Returns the path of the cached table file for this configuration
+    load_or_build(cache_dir)
+        Memory-maps the cached table, building and saving it first if needed
+    lookup(guess, secret)
+        Returns the encoded feedback of guess index against secret index
+    row(guess, secrets=None)
+        Returns the encoded feedback of guess index against an array of secret indices
+    rows(guesses, secrets)
+        Returns the encoded feedback of an array of guess indices against an array of secret indices
+    pairs(guesses, secrets)
+        Returns the encoded feedback of each guess against the secret at the same position
+    partition_counts(guesses, secrets)
+        Returns the feedback histogram of each guess against the secrets
+    """
+
+    def __init__(self, code_length, num_colours, cache_dir=None):
+        """
+        Builds or loads the feedback table.
+
+        :param code_length: the length of the code
+        :param num_colours: the number of colours
+        :param cache_dir: directory of the on-disk table cache, None to always build in memory
+        """
+        self.code_length = code_length
+        self.num_colours = num_colours
+        self.num_codes = num_codes(code_length, num_colours)
+        # Streaming agents must not hold the whole code space, not even through their feedback table
+        if self.num_codes > game_settings['streamingThreshold']:
+            self.codes, self.counts = None, None
+        else:
+            _, self.codes, self.counts = shared_code_space(code_length, num_colours)
+        if self.num_codes > MAX_TABLE_CODES:
+            self.table = None
+        elif cache_dir is None:
+            self.table = read_only(self.build())
+        else:
+            self.table = self.load_or_build(cache_dir)
+
+    def code_rows(self, indices):
+        """
+        Returns the codes with the given indices.
+
+        :param indices: array of code indices
+        :return: a (len(indices), code_length) uint8 array
+        """
+        if self.codes is None:
+            return codes_from_indices(indices, self.code_length, self.num_colours)
+        return self.codes[indices]
+
+    def count_rows(self, indices):
+        """
+        Returns the colour counts of the codes with the given indices.
+
+        :param indices: array of code indices
+        :return: a (len(indices), num_colours) uint8 array
+        """
+        if self.counts is None:
+            return colour_counts(self.code_rows(indices), self.num_colours)
+        return self.counts[indices]
+
+    def build(self):
+        """
+        Computes the feedback of every code against every code, one block of guesses at a time.
+
+        :return: a (N, N) uint8 array of encoded feedback
+        """
+        n = self.num_codes
+        codes, counts = self.code_rows(np.arange(n)), self.count_rows(np.arange(n))
+        table = np.empty((n, n), dtype=np.uint8)
+        for start in range(0, n, TABLE_BLOCK_SIZE):
+            stop = min(start + TABLE_BLOCK_SIZE, n)
+            table[start:stop] = feedback_block(codes[start:stop], codes, counts[start:stop], counts)
+        return table
+
+    def cache_path(self, cache_dir):
+        """
+        Returns the path of the cached table file for this configuration.
+
+        :param cache_dir: directory of the on-disk table cache
+        :return: path of the .npy file
+        """
+        return os.path.join(cache_dir, "feedback_%dx%d.npy" % (self.code_length, self.num_colours))
+
+    def load_or_build(self, cache_dir):
+        """
+        Memory-maps the cached table, building and saving it first if it is missing or stale.
+
+        :param cache_dir: directory of the on-disk table cache
+        :return: a read-only (N, N) uint8 memory-mapped array
+        """
+        path = self.cache_path(cache_dir)
+        n = self.num_codes
+        if os.path.exists(path):
+            table = np.load(path, mmap_mode='r')
+            if table.shape == (n, n) and table.dtype == np.uint8:
+                return table
+
+        atomic_save(path, lambda f: np.save(f, self.build()))
+        return np.load(path, mmap_mode='r')
+
+    def lookup(self, guess, secret):
+        """
+        Returns the encoded feedback of a guess against a secret.
+
+        :param guess: index of the guess
+        :param secret: index of the secret
+        :return: the encoded feedback byte
+        """
+        if self.table is None:
+            return self.row(guess, np.array([secret]))[0]
+        profiling.count('feedback_evaluations')
+        return self.table[guess, secret]
+
+    def row(self, guess, secrets=None):
+        """
+        Returns the encoded feedback of a guess against many secrets.
+
+        :param guess: index of the guess
+        :param secrets: array of secret indices, None for all codes
+        :return: a uint8 array of encoded feedback
+        """
+        if self.table is None:
+            guess_code = self.code_rows([guess])[0]
+            if secrets is None:
+                if self.codes is None:
+                    return np.concatenate([feedback_against(guess_code, codes, self.num_colours) for _, codes in
+                                           code_chunks(self.code_length, self.num_colours, MAX_TABLE_CODES)])
+                return feedback_against(guess_code, self.codes, self.num_colours, self.counts)
+            return feedback_against(guess_code, self.code_rows(secrets), self.num_colours, self.count_rows(secrets))
+        profiling.count('feedback_evaluations', self.num_codes if secrets is None else len(secrets))
+        if secrets is None:
+            return self.table[guess]
+        return self.table[guess, secrets]
+
+    def rows(self, guesses, secrets):
+        """
+        Returns the encoded feedback of many guesses against many secrets.
+
+        :param guesses: array of guess indices
+        :param secrets: array of secret indices
+        :return: a (len(guesses), len(secrets)) uint8 array of encoded feedback
+        """
+        if self.table is None:
+            return feedback_block(self.code_rows(guesses), self.code_rows(secrets),
+                                  self.count_rows(guesses), self.count_rows(secrets))
+        profiling.count('feedback_evaluations', len(guesses) * len(secrets))
+        return self.table[np.ix_(guesses, secrets)]
+
+    def pairs(self, guesses, secrets):
+        """
+        Returns the encoded feedback of each guess against the secret at the same position.
+
+        :param guesses: array of guess indices
+        :param secrets: array of secret indices, the same length as guesses
+        :return: a uint8 array of encoded feedback
+        """
+        profiling.count('feedback_evaluations', len(guesses))
+        if self.table is not None:
+            return self.table[guesses, secrets]
+        in_place = (self.code_rows(guesses) == self.code_rows(secrets)).sum(axis=1, dtype=np.uint8)
+        common = np.minimum(self.count_rows(guesses), self.count_rows(secrets)).sum(axis=1, dtype=np.uint8)
+        return in_place * np.uint8(self.code_length) + common
+
+    def partition_counts(self, guesses, secrets):
+        """
+        Counts how the secrets split by feedback for each guess, one bincount per block of guesses.
+
+        :param guesses: array of guess indices
+        :param secrets: array of secret indices
+        :return: a (len(guesses), num_feedbacks) array of partition sizes
+        """
+        size = num_feedbacks(self.code_length)
+        counts = np.empty((len(guesses), size), dtype=np.int64)
+        block_size = max(1, PARTITION_BLOCK_ELEMENTS // max(1, len(secrets)))
+        for start in range(0, len(guesses), block_size):
+            block = guesses[start:start + block_size]
+            # Offset each guess's feedback into its own range so a single bincount histograms the whole block
+            feedback = self.rows(block, secrets) + (np.arange(len(block)) * size)[:, None]
+            counts[start:start + len(block)] = np.bincount(feedback.ravel(),
+                                                           minlength=len(block) * size).reshape(len(block), size)
+        return counts
@@ -0,0 +1,202 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from cache import atomic_save
+from feedback import code_chunks, colour_counts, feedback_block, index_to_code, num_feedbacks
+from opening_book import default_first_guess
+from scoring import SCORERS, get_scorer
+from settings import game_settings
+
+
+def first_guess_patterns(code_length, num_colours):
+    """
+    Lists the distinct first guesses. Before any feedback every colour and every position is
+    interchangeable, so a first guess is only characterised by how many times its colours repeat:
+    one guess per partition of code_length into at most num_colours parts.
+
+    :param code_length: the length of the code
+    :param num_colours: the number of colours
+    :return: list of (pattern, index) tuples, pattern being the colour multiplicities in decreasing order
+             and index that of the guess with colour 0 repeated pattern[0] times, then colour 1, and so on
+    """
+    def partitions(remaining, largest, parts):
+        if remaining == 0:
+            yield ()
+            return
+        if parts == 0:
+            return
+        for part in range(min(remaining, largest), 0, -1):
+            for rest in partitions(remaining - part, part, parts - 1):
+                yield (part,) + rest
+
+    patterns = []
+    for pattern in partitions(code_length, code_length, num_colours):
+        index = 0
+        for colour, repeats in enumerate(pattern):
+            for _ in range(repeats):
+                index = index * num_colours + colour
+        patterns.append((pattern, index))
+    return patterns
+
+
+def first_guess_partitions(code_length, num_colours, guesses, chunk_size):
+    """
+    Counts how each first guess splits the whole code space by feedback, generating the codes
+    chunk by chunk so the space never has to fit in memory.
+
+    :param code_length: the length of the code
+    :param num_colours: the number of colours
+    :param guesses: a (G, code_length) array of colour indices
+    :param chunk_size: the number of codes per chunk
+    :return: a (G, num_feedbacks) int64 array of partition sizes
+    """
+    guesses = np.asarray(guesses, dtype=np.uint8)
+    guess_counts = colour_counts(guesses, num_colours)
+    feedbacks = num_feedbacks(code_length)
+    offsets = (np.arange(len(guesses)) * feedbacks)[:, None]
+    counts = np.zeros(len(guesses) * feedbacks, dtype=np.int64)
+    for _, codes in code_chunks(code_length, num_colours, chunk_size):
+        feedback = feedback_block(guesses, codes, guess_counts, colour_counts(codes, num_colours))
+        counts += np.bincount((feedback + offsets).ravel(), minlength=len(counts))
+    return counts.reshape(len(guesses), feedbacks)
+
+
+def rank_first_guesses(code_length, colours, scorer_name, chunk_size=None):
+    """
+    Scores every distinct first guess pattern and ranks the patterns by a scorer.
+
+    :param code_length: the length of the code
+    :param colours: list of characters representing available colours
+    :param scorer_name: the key of scoring.SCORERS to rank by
+    :param chunk_size: the number of codes per chunk, None for the codeChunkSize setting
+    :return: list of dicts, one per pattern, best first
+    """
+    if chunk_size is None:
+        chunk_size = game_settings['codeChunkSize']
+    patterns = first_guess_patterns(code_length, len(colours))
+    indices = np.array([index for _, index in patterns], dtype=np.int64)
+    guesses = np.array([[colours.index(c) for c in index_to_code(index, colours, code_length)] for index in indices])
+    counts = first_guess_partitions(code_length, len(colours), guesses, chunk_size)
+
+    # Every scorer is reported for every pattern, all higher is better
+    metrics = {name: scorer(counts) for name, scorer in SCORERS.items()}
+    scores = get_scorer(scorer_name)(counts)
+    # Stable sort keeps ties in pattern order, fewest colours first
+    order = np.argsort(-scores, kind='stable')
+    return [{
+        'pattern': list(patterns[i][0]),
+        'guess': ''.join(index_to_code(indices[i], colours, code_length)),
+        'index': int(indices[i]),
+        'entropy': float(metrics['entropy'][i]),
+        'largest_partition': int(-metrics['minimax'][i]),
+        'expected_size': float(-metrics['expected_size'][i]),
+        'parts': int(metrics['most_parts'][i]),
+    } for i in order]
+
+
+def ranking_path(cache_dir, code_length, num_colours, scorer_name):
+    """
+    Returns the path of a ranked first guess table.
+
+    :param cache_dir: directory of the on-disk cache
+    :param code_length: the length of the code
+    :param num_colours: the number of colours
+    :param scorer_name: the key of scoring.SCORERS the table is ranked by
+    :return: path of the .json file
+    """
+    return os.path.join(cache_dir, "first_guesses_%dx%d_%s.json" % (code_length, num_colours, scorer_name))
+
+
+def save_ranking(ranking, path):
+    """
+    Writes a ranked first guess table.
+
+    :param ranking: the list returned by rank_first_guesses
+    :param path: path of the .json file
+    """
+    atomic_save(path, lambda f: json.dump(ranking, f, indent=2), mode='w')
+
+
+def load_ranking(path):
+    """
+    Reads a ranked first guess table.
+
+    :param path: path of the .json file
+    :return: list of dicts, one per pattern, best first
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def ranked_first_guess(code_length, colours, scorer_name, cache_dir=None):
+    """
+    Returns the best first guess for a scorer, from the cached table if there is one, ranking the
+    patterns (and caching the table) otherwise.
+
+    :param code_length: the length of the code
+    :param colours: list of characters representing available colours
+    :param scorer_name: the key of scoring.SCORERS to rank by
+    :param cache_dir: directory of the on-disk cache, None to always rank in memory
+    :return: index of the best first guess
+    """
+    if cache_dir is None:
+        return rank_first_guesses(code_length, colours, scorer_name)[0]['index']
+
+    path = ranking_path(cache_dir, code_length, len(colours), scorer_name)
+    if os.path.exists(path):
+        return load_ranking(path)[0]['index']
+    ranking = rank_first_guesses(code_length, colours, scorer_name)
+    save_ranking(ranking, path)
+    return ranking[0]['index']
+
+
+def opening_guess(code_length, colours):
+    """
+    Returns the first guess agents open with: the best ranked pattern for the guessScorer setting
+    if rankedFirstGuess is set, otherwise default_first_guess.
+
+    :param code_length: the length of the code
+    :param colours: list of characters representing available colours
+    :return: index of the first guess
+    """
+    if game_settings['rankedFirstGuess']:
+        return ranked_first_guess(code_length, colours, game_settings['guessScorer'], game_settings['feedbackCacheDir'])
+    return default_first_guess(code_length, len(colours))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank the distinct first guesses of a Mastermind configuration.")
+    parser.add_argument("--length", type=int, default=game_settings['codeLength'])
+    parser.add_argument("--colours", type=int, default=game_settings['numberOfColours'])
+    parser.add_argument("--scorer", default=game_settings['guessScorer'], help="scorer to rank by")
+    parser.add_argument("--output", default=None, help="path of the ranked table, the cache directory if omitted")
+    args = parser.parse_args()
+
+    colours = ['B', 'R', 'G', 'Y', 'P', 'C'][:args.colours]
+    if len(colours) < args.colours:
+        raise RuntimeError("Error! The number of colours must be between 1 and 6")
+
+    start = time.time()
+    ranking = rank_first_guesses(args.length, colours, args.scorer)
+    elapsed = time.time() - start
+
+    print("%-*s %10s %10s %10s %6s" % (args.length, "Guess", "Entropy", "Largest", "Expected", "Parts"))
+    for row in ranking:
+        print("%-*s %10.4f %10d %10.2f %6d" % (args.length, row['guess'], row['entropy'], row['largest_partition'],
+                                              row['expected_size'], row['parts']))
+    print("Ranked %d patterns by %s in %.2f s" % (len(ranking), args.scorer, elapsed))
+
+    output = args.output
+    if output is None and game_settings['feedbackCacheDir'] is not None:
+        output = ranking_path(game_settings['feedbackCacheDir'], args.length, args.colours, args.scorer)
+    if output is not None:
+        save_ranking(ranking, output)
+        print("Wrote", output)
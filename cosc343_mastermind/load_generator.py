@@ -0,0 +1,127 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from benchmark import percentiles
+from mastermind import evaluate_guess
+from settings import game_settings
+
+
+async def request(reader, writer, message, latencies):
+    """
+    Sends a request to the solver server and waits for its reply, recording the round trip.
+
+    :param reader: the asyncio StreamReader of the connection
+    :param writer: the asyncio StreamWriter of the connection
+    :param message: the request
+    :param latencies: list the round trip time in seconds is appended to
+    :return: the decoded reply
+    """
+    start = time.perf_counter()
+    writer.write((json.dumps(message) + "\n").encode())
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    latencies.append(time.perf_counter() - start)
+    if 'error' in reply:
+        raise RuntimeError(reply['error'])
+    return reply
+
+
+async def play_games(connect, targets, num_guesses, scores, latencies):
+    """
+    Plays games through one connection, one after another, until no target is left.
+
+    :param connect: coroutine function opening a connection, returning a (reader, writer) tuple
+    :param targets: list of target codes as lists of colour characters, shared by all clients
+    :param num_guesses: max. number of guesses per game
+    :param scores: list each game's score is appended to, scored as in MastermindGame.play
+    :param latencies: list the round trip time of every request is appended to
+    """
+    reader, writer = await connect()
+    try:
+        while targets:
+            target = targets.pop()
+            reply = await request(reader, writer, {'op': 'new'}, latencies)
+            session = reply['session']
+            for guesses in range(1, num_guesses + 1):
+                in_place, in_colour = evaluate_guess(list(reply['guess']), target)
+                reply = await request(reader, writer, {'op': 'feedback', 'session': session, 'in_place': in_place,
+                                                       'in_colour': in_colour}, latencies)
+                if reply.get('solved'):
+                    scores.append(guesses)
+                    break
+            else:
+                await request(reader, writer, {'op': 'end', 'session': session}, latencies)
+                scores.append(num_guesses * 2)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def generate_load(connect, targets, num_guesses, num_clients):
+    """
+    Plays every target through num_clients concurrent connections.
+
+    :param connect: coroutine function opening a connection, returning a (reader, writer) tuple
+    :param targets: list of target codes as lists of colour characters
+    :param num_guesses: max. number of guesses per game
+    :param num_clients: the number of concurrent connections
+    :return: a dictionary of summary statistics
+    """
+    targets = list(reversed(targets))
+    scores, latencies = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*[play_games(connect, targets, num_guesses, scores, latencies) for _ in range(num_clients)])
+    total_time = time.perf_counter() - start
+
+    return {
+        "games": len(scores),
+        "clients": num_clients,
+        "requests": len(latencies),
+        "total_time": total_time,
+        "games_per_second": len(scores) / total_time,
+        "requests_per_second": len(latencies) / total_time,
+        "average_score": float(np.mean(scores)),
+        "latency": percentiles(latencies),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play many concurrent games against solver_server.py.")
+    parser.add_argument("--host", default=game_settings['serverHost'])
+    parser.add_argument("--port", type=int, default=game_settings['serverPort'])
+    parser.add_argument("--socket", default=game_settings['serverSocket'], help="Unix socket path, TCP if omitted")
+    parser.add_argument("--clients", type=int, default=16, help="number of concurrent connections")
+    parser.add_argument("--games", type=int, default=game_settings['totalNumberOfGames'])
+    parser.add_argument("--seed", type=int, default=game_settings['seed'] if game_settings['seed'] is not None else 0)
+    parser.add_argument("--json", default=None, help="path of the JSON report, none if omitted")
+    args = parser.parse_args()
+
+    colours = np.array(['B', 'R', 'G', 'Y', 'P', 'C'][:game_settings['numberOfColours']])
+    rnd = np.random.RandomState(args.seed)
+    targets = [list(colours[target]) for target in
+               rnd.randint(0, len(colours), size=(args.games, game_settings['codeLength']))]
+
+    if args.socket is not None:
+        connect = lambda: asyncio.open_unix_connection(args.socket)
+    else:
+        connect = lambda: asyncio.open_connection(args.host, args.port)
+
+    report = asyncio.run(generate_load(connect, targets, game_settings['maxNumberOfGuesses'], args.clients))
+    latency = report["latency"]
+    print("%d games over %d clients in %.2f s: %.1f games/s, %.1f requests/s, average score %.3f" % (
+        report["games"], report["clients"], report["total_time"], report["games_per_second"],
+        report["requests_per_second"], report["average_score"]))
+    print("Request latency: p50 %.2f ms, p95 %.2f ms, p99 %.2f ms, max %.2f ms" % (
+        latency["p50"] * 1000, latency["p95"] * 1000, latency["p99"] * 1000, latency["max"] * 1000))
+
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
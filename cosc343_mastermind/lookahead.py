@@ -0,0 +1,158 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import hashlib
+import math
+
+import numpy as np
+
+from cache import LRUCache
+from feedback import encode_feedback, feedbacks_per_total
+
+
+def candidate_key(candidates):
+    """
+    Hashes a candidate set independently of the order of its codes.
+
+    :param candidates: numpy array of the indices of candidate codes
+    :return: a 16 byte digest
+    """
+    return hashlib.blake2b(np.sort(candidates).astype(np.int64).tobytes(), digest_size=16).digest()
+
+
+def leaf_estimate(size, feedbacks):
+    """
+    Estimates the number of guesses needed to solve a set of candidates without searching it: a
+    candidate guess splitting the rest into singletons, plus one guess for every further
+    (feedbacks - 1)-way split the set needs. This is optimistic, like the splits it assumes.
+
+    :param size: the number of candidates
+    :param feedbacks: the number of feedbacks that can occur
+    :return: the estimated number of guesses
+    """
+    if size <= 1:
+        return float(size)
+    branching = feedbacks - 1
+    return (2 * size - 1) / size + max(math.log(size / branching), 0) / math.log(branching)
+
+
+class Lookahead:
+    """
+    Chooses guesses by the expected number of guesses left, searching a few plies ahead.
+
+    At every ply only the best few guesses by the agent's scorer are searched. Past the last ply the
+    number of guesses left is estimated from the candidate count alone. Once the turn's deadline has
+    passed, sub-games not searched yet are estimated the same way and their values are not memoised.
+
+    ...
+
+    Attributes
+    ----------
+    feedback_table : FeedbackTable
+        the feedback table of the game configuration
+    rank_guesses : function
+        maps an array of candidate indices and a count to the indices of that many guesses, best first
+    past_deadline : function
+        returns True once the turn's deadline has passed, marking the search as cut short
+    depth : int
+        the number of plies searched, including the guess being chosen
+    width : int
+        the number of guesses searched at every ply
+    memo : LRUCache
+        the expected number of guesses of recently searched sub-games, by (candidate_key, depth)
+
+    Methods
+    -------
+    choose_guess(candidates)
+        Returns the guess leaving the fewest expected guesses
+    value(candidates, depth)
+        Returns the expected number of guesses to solve a set of candidates
+    guess_value(guess, candidates, depth)
+        Returns the expected number of guesses to solve a set of candidates starting with a guess
+    """
+
+    def __init__(self, feedback_table, rank_guesses, past_deadline, depth, width, memo_size):
+        """
+        :param feedback_table: the feedback table of the game configuration
+        :param rank_guesses: maps an array of candidate indices and a count to that many guesses, best first
+        :param past_deadline: returns True once the turn's deadline has passed, marking the search as cut short
+        :param depth: the number of plies searched, including the guess being chosen
+        :param width: the number of guesses searched at every ply
+        :param memo_size: the number of sub-game values kept
+        """
+        self.feedback_table = feedback_table
+        self.rank_guesses = rank_guesses
+        self.past_deadline = past_deadline
+        self.depth = depth
+        self.width = width
+        self.memo = LRUCache(memo_size)
+        # Only these feedbacks can occur, the encoding space has gaps
+        self.feedbacks = int(feedbacks_per_total(feedback_table.code_length).sum())
+        self.solved = encode_feedback(feedback_table.code_length, 0, feedback_table.code_length)
+
+    def choose_guess(self, candidates):
+        """
+        Returns the guess leaving the fewest expected guesses, the best scoring one on ties. After the
+        deadline only the guesses already searched are compared.
+
+        :param candidates: numpy array of the indices of candidate codes
+        :return: index of the best guess
+        """
+        guesses = self.rank_guesses(candidates, self.width)
+        if len(candidates) <= 2:
+            return guesses[0]
+        values = []
+        for guess in guesses:
+            if values and self.past_deadline():
+                break
+            values.append(self.guess_value(guess, candidates, self.depth - 1))
+        return guesses[int(np.argmin(values))]
+
+    def value(self, candidates, depth):
+        """
+        Returns the expected number of guesses to solve a set of candidates, searching depth plies.
+
+        :param candidates: numpy array of the indices of candidate codes
+        :param depth: the number of plies left to search
+        :return: the expected number of guesses
+        """
+        if len(candidates) <= 2:
+            return (2 * len(candidates) - 1) / len(candidates)
+        if depth == 0 or self.past_deadline():
+            return leaf_estimate(len(candidates), self.feedbacks)
+
+        key = (candidate_key(candidates), depth)
+        value = self.memo.get(key)
+        if value is None:
+            # No guess can do better than splitting the candidates into singletons
+            best_possible = (2 * len(candidates) - 1) / len(candidates)
+            value = math.inf
+            for guess in self.rank_guesses(candidates, self.width):
+                value = min(value, self.guess_value(guess, candidates, depth - 1))
+                if value <= best_possible or self.past_deadline():
+                    break
+            # The deadline only passes once, so a search it did not cut short is complete
+            if not self.past_deadline():
+                self.memo.put(key, value)
+        return value
+
+    def guess_value(self, guess, candidates, depth):
+        """
+        Returns the expected number of guesses to solve a set of candidates when guessing guess first.
+
+        :param guess: index of the first guess
+        :param candidates: numpy array of the indices of candidate codes
+        :param depth: the number of plies left to search after the guess
+        :return: the expected number of guesses
+        """
+        feedback = self.feedback_table.row(guess, candidates)
+        order = np.argsort(feedback, kind='stable')
+        feedbacks, starts = np.unique(feedback[order], return_index=True)
+        parts = np.split(candidates[order], starts[1:])
+
+        expected = 1.0
+        for f, part in zip(feedbacks, parts):
+            if f != self.solved:
+                expected += len(part) / len(candidates) * self.value(part, depth)
+        return expected
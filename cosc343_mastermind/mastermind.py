@@ -5,53 +5,30 @@ __email__ = "lech.szymanski@otago.ac.nz"
 import os,sys
 import numpy as np
 import importlib
+import multiprocessing
+import random
 import time
+import profiling
+import telemetry
+from cache import cache_stats, merge_cache_stats
+from feedback import all_codes
 from settings import game_settings
-
-class bcolors:
-   RED = '\033[1;30;41m'
-   GREEN = '\033[1;30;42m'
-   YELLOW = '\033[1;30;43m'
-   BLUE = '\033[1;30;44m'
-   PURPLE = '\033[1;30;45m'
-   CYAN = '\033[1;30;46m'
-   ENDC = '\033[0m'
+from telemetry import colour_char
 
 def print_colour_char(c):
-   if c == 'B':
-      sys.stdout.write(f"{bcolors.BLUE}B{bcolors.ENDC}")
-   elif c == 'R':
-      sys.stdout.write(f"{bcolors.RED}R{bcolors.ENDC}")
-   elif c == 'G':
-      sys.stdout.write(f"{bcolors.GREEN}G{bcolors.ENDC}")
-   elif c == 'Y':
-      sys.stdout.write(f"{bcolors.YELLOW}Y{bcolors.ENDC}")
-   elif c == 'C':
-      sys.stdout.write(f"{bcolors.CYAN}C{bcolors.ENDC}")
-   elif c == 'P':
-      sys.stdout.write(f"{bcolors.PURPLE}P{bcolors.ENDC}")
-   else:
-       sys.stdout.write("%c" % c)
+   sys.stdout.write(colour_char(c))
    sys.stdout.flush()
 
-def time_to_str(time_in_seconds):
-   timeStr = ''
-   if time_in_seconds > 3600:
-      hours = int(np.floor(time_in_seconds / 3600))
-      timeStr += "%d h, " % hours
-      time_in_seconds %= 3600
-
-   if time_in_seconds > 60:
-      minutes = int(np.floor(time_in_seconds / 60))
-      timeStr += "%d min, " % minutes
-      time_in_seconds %= 60
+def code_as_list(code):
+   """ Converts a code to a flat list of colour characters
 
-   if time_in_seconds < 1:
-      timeStr += "%.1f s" % time_in_seconds
-   else:
-      timeStr += "%d s" % time_in_seconds
+         :param code: a list or numpy array of colour characters
 
-   return timeStr
+         :return: a list of colour characters
+   """
+   if isinstance(code, np.ndarray):
+      return code.ravel().tolist()
+   return list(code)
 
 def evaluate_guess(guess,target):
    """ Evaluates a guess against a target
@@ -69,30 +46,132 @@ def evaluate_guess(guess,target):
 
          """
 
+   guess = code_as_list(guess)
+   target = code_as_list(target)
 
-   guess = np.reshape(guess, (-1))
-   target = np.reshape(target, (-1))
+   in_place = sum(g == t for g, t in zip(guess, target))
 
-   I = np.where(guess==target)[0]
-   in_place = len(I)
-   I = np.where(guess!=target)[0]
-   state = np.zeros(np.shape(target))
+   # Colours matched anywhere are the per-colour minimum counts, the in place ones included
+   in_common = sum(min(guess.count(c), target.count(c)) for c in set(guess))
 
-   in_colour = 0
-   for i in I:
-      a = target[i]
-      for j in I:
-         if state[j] != 0:
-            continue
+   return in_place, in_common - in_place
 
-         b = guess[j]
+def evaluate_guess_pairs(guesses,targets,num_colours):
+   """ Evaluates many guesses, each against its own target, at once
 
-         if a==b:
-            in_colour += 1
-            state[j] = -1
-            break
+         :param guesses: a numpy array of colour indices, one guess per row
+
+                targets: a numpy array of colour indices of the same shape, one target solution per row
+
+                num_colours: the number of colours
+
+
+         :return: a tuple of 2 integer numpy arrays, one entry per row:
+
+                  - the number of correct colours in place in each guess against its target
+
+                  - the number of correct colours out of place in each guess against its target
 
-   return in_place, in_colour
+         """
+
+   in_place = np.sum(guesses == targets, axis=1)
+
+   in_common = np.zeros(len(targets), dtype=int)
+   for c in range(num_colours):
+      in_common += np.minimum(np.sum(guesses == c, axis=1), np.sum(targets == c, axis=1))
+
+   return in_place, in_common - in_place
+
+def seed_game(game_seed):
+   """ Seeds the random generators used by the agents so that a game plays out the same
+       regardless of which process plays it
+
+         :param game_seed: integer seed drawn for this game
+   """
+   random.seed(int(game_seed))
+   np.random.seed(int(game_seed))
+
+def split_shards(num_games, num_workers):
+   """ Splits the games of a run into contiguous shards, several per worker since some shards are
+       slower than others and the pool is kept busy until the last one
+
+         :param num_games: total number of games played
+         :param num_workers: number of worker processes, 1 to play in this process
+
+         :return: a list of (first, end) game positions, one per shard, a single shard for one worker
+   """
+   num_shards = min(num_games, num_workers * 4) if num_workers > 1 else 1
+   starts = [int(num_games * k / num_shards) for k in range(num_shards + 1)]
+   return list(zip(starts[:-1], starts[1:]))
+
+def shard_player(code_length, num_colours, agentFile, num_guesses):
+   """ Builds the game and the player of a shard, in a worker process or in this one
+
+         :param code_length: the length of the code
+         :param num_colours: the number of colours
+         :param agentFile: name of the agent file
+         :param num_guesses: max. number of guesses per game
+
+         :return: a tuple (game, player)
+   """
+   # Workers report through their results and the parent process emits the run's events, a shard played
+   # in the parent process keeps its sink. Workers do not profile, what they record would be lost with them.
+   in_worker = multiprocessing.parent_process() is not None
+   if in_worker:
+      profiling.configure(False)
+   sink = telemetry.NullSink() if in_worker else telemetry.get_sink()
+   game = MastermindGame(code_length=code_length, num_colours=num_colours, verbose=False, sink=sink)
+   player = Player(playerFile=agentFile, code_length=code_length, colours=list(game.colours),
+                   num_guesses=num_guesses)
+   return game, player
+
+def play_shard(shard):
+   """ Plays a shard of games in a worker process with its own player
+
+         :param shard: a tuple (code_length, num_colours, agentFile, num_guesses, targets, game_seeds), where
+                       targets is an array of colour indices, one row per game, and game_seeds holds
+                       one seed per game
+
+         :return: a tuple (results, caches), where results is a list of (game_score, game_time) tuples, one
+                  per game in the shard, and caches holds the cache statistics of the shard's agent
+   """
+   code_length, num_colours, agentFile, num_guesses, targets, game_seeds = shard
+
+   game, player = shard_player(code_length, num_colours, agentFile, num_guesses)
+   colours = np.array(game.colours)
+
+   results = []
+   for target, game_seed in zip(targets, game_seeds):
+      seed_game(game_seed)
+      start = time.time()
+      game_score = game.play(player, target=colours[target], num_guesses=num_guesses)
+      results.append((game_score, time.time() - start))
+   return results, cache_stats(player.agent)
+
+def play_exhaustive_shard(shard):
+   """ Plays a shard of the targets of an exhaustive run in a worker process with its own player
+
+         :param shard: a tuple (code_length, num_colours, agentFile, num_guesses, first_target, targets), where
+                       targets is an array of colour indices, one row per game, and first_target is the
+                       position of its first row among all targets
+
+         :return: a tuple (scores, caches), where scores is a numpy array of game scores, one per target in
+                  the shard, and caches holds the cache statistics of the shard's agent
+   """
+   code_length, num_colours, agentFile, num_guesses, first_target, targets = shard
+
+   game, player = shard_player(code_length, num_colours, agentFile, num_guesses)
+
+   if hasattr(player.agent, 'AgentFunctionBatch'):
+      return game.play_batch(player, targets, num_guesses, first_game=first_target), cache_stats(player.agent)
+
+   # Agents playing one game at a time are seeded by target, so any sharding gives the same scores
+   colours = np.array(game.colours)
+   scores = []
+   for i, target in enumerate(targets):
+      seed_game(first_target + i)
+      scores.append(game.play(player, target=colours[target], num_guesses=num_guesses, game=first_target + i))
+   return np.array(scores), cache_stats(player.agent)
 
 # Class player is a wrapper for a player agent
 class Player:
@@ -108,20 +187,21 @@ class Player:
          raise RuntimeError("Error! Agent file %s needs a '.py' extension" % self.playerFile)
 
 
-      try:
-         self.exec = importlib.import_module(playerModule)
-      except Exception as e:
-         raise RuntimeError(str(e))
+      with profiling.span('player_construction'):
+         try:
+            self.exec = importlib.import_module(playerModule)
+         except Exception as e:
+            raise RuntimeError(str(e))
 
-      try:
-         self.agent = self.exec.MastermindAgent(code_length=code_length, colours=colours,num_guesses=num_guesses)
-      except Exception as e:
-         raise RuntimeError(str(e))
+         try:
+            self.agent = self.exec.MastermindAgent(code_length=code_length, colours=colours,num_guesses=num_guesses)
+         except Exception as e:
+            raise RuntimeError(str(e))
 
 
 class MastermindGame:
 
-   def __init__(self,code_length=5,num_colours=3,verbose=False,tournament=False):
+   def __init__(self,code_length=5,num_colours=3,verbose=False,tournament=False,sink=None):
 
       self.colours = ['B','R','G','Y','P','C']
       self.code_length = code_length
@@ -133,11 +213,16 @@ class MastermindGame:
 
       self.colours = self.colours[:num_colours]
 
-      if self.verbose:
-         print("Mastermind")
+      # The cache statistics of the agents of the last run, as reported in its run_finished event
+      self.caches = {}
 
-         print("  Code length: %s" % self.code_length)
-         print("      Colours: %s" % self.colours)
+      # Game and agent events all go to the process' sink, built from the settings unless one is given
+      if sink is None:
+         sink = telemetry.make_sink(game_settings['telemetry'], game_settings['telemetryPath'], verbose)
+      telemetry.set_sink(sink)
+
+      if self.verbose:
+         telemetry.emit('game_created', code_length=self.code_length, colours=list(self.colours))
 
    def errorAndExit(self,errorStr):
       raise RuntimeError(errorStr)
@@ -148,8 +233,23 @@ class MastermindGame:
 
 
 
-   def play(self,player,target,num_guesses):
+   def draw_games(self, rnd, num_games):
+      """ Draws the targets and the per-game seeds of a run
+
+         :param rnd: the RandomState seeded for the run
+         :param num_games: total number of games played
 
+         :return: a tuple (targets, game_seeds), where targets is a num_games x code_length array of colour
+                  indices and game_seeds holds one seed per game
+      """
+      targets = rnd.randint(0, len(self.colours), size=(num_games, self.code_length))
+      game_seeds = rnd.randint(0, 2**31 - 1, size=num_games)
+      return targets, game_seeds
+
+   def play(self,player,target,num_guesses,game=0):
+
+      profiling.start_game(game)
+      start = time.perf_counter()
       score = 0
       guess = 0
       actions = np.zeros(shape=(self.code_length)).astype('uint8')
@@ -159,10 +259,14 @@ class MastermindGame:
 
          percepts = (guess, actions, in_place, in_colour)
 
+         profiling.set_turn(guess + 1)
+         agent_start = time.perf_counter()
          try:
-            actions = player.agent.AgentFunction(percepts)
+            with profiling.span('agent_function'):
+               actions = player.agent.AgentFunction(percepts)
          except Exception as e:
             self.throwError(str(e))
+         agent_time = time.perf_counter() - agent_start
 
          try:
             if not isinstance(actions,list) and not isinstance(actions,np.ndarray):
@@ -186,72 +290,205 @@ class MastermindGame:
                      "Error! AgentFunction from '%s.py' returned a list \n%s\n, which contains illegal character '%c' (legal characters are %s)."
                      % (player.playerFile, actions, a, self.colours))
 
-         in_place, in_colour = evaluate_guess(actions,target)
+         with profiling.span('evaluate_guess'):
+            in_place, in_colour = evaluate_guess(actions,target)
 
 
          score += 1
          guess += 1
 
-         if self.verbose:
+         if telemetry.enabled():
+            telemetry.emit('turn_played', game=game, turn=guess, guess=''.join(code_as_list(actions)),
+                           in_place=int(in_place), in_colour=int(in_colour), agent_time=agent_time)
 
-            sys.stdout.write("Guess %2d:\r\n" % (guess))
+         if in_place == np.prod(np.shape(target)):
+            if telemetry.enabled():
+               telemetry.emit('game_finished', game=game, score=score, guesses=score, solved=True,
+                              target=''.join(code_as_list(target)), game_time=time.perf_counter() - start)
+            profiling.end_game(game)
+            return score
 
-            sys.stdout.write(u'\u2713' + "%d " % in_place)
+         if guess >= num_guesses:
+            break
 
-            #sys.stdout.write("\n\r")
-            #sys.stdout.write("   ");
+      if telemetry.enabled():
+         telemetry.emit('game_finished', game=game, score=score*2, guesses=score, solved=False,
+                        target=''.join(code_as_list(target)), game_time=time.perf_counter() - start)
+      profiling.end_game(game)
+      return score*2
 
-            for c in actions:
-               print_colour_char(c)
+   def play_batch(self,player,targets,num_guesses,first_game=0):
+      """ Plays many games in lockstep, one turn of every game at a time
+
+         The agent's AgentFunctionBatch gets the percepts of all games at once, as a tuple
+         (guess_counter, last_guesses, in_place, in_colour) where last_guesses is a num_games x code_length
+         array of colour indices and in_place, in_colour hold one count per game, and returns the next
+         guesses in the same form. A game solved by the last guesses is in the percepts once more, with
+         in_place equal to the code length, and gets no next guess: the agent returns one row per game
+         it has not solved, in game order, and solved games are left out of later percepts. Agents
+         without AgentFunctionBatch play the games one after another.
+
+         :param player: the Player
+         :param targets: a num_games x code_length array of colour indices, one target solution per row
+         :param num_guesses: max. number of guesses per game
+         :param first_game: the number of the first game, from 0
+
+         :return: a numpy array of game scores, scored as in play()
+      """
+      targets = np.asarray(targets)
+      if not hasattr(player.agent, 'AgentFunctionBatch'):
+         colours = np.array(self.colours)
+         return np.array([self.play(player, target=colours[target], num_guesses=num_guesses, game=first_game + i)
+                          for i, target in enumerate(targets)])
+
+      scores = np.full(len(targets), num_guesses*2)
+      solved = np.zeros(len(targets), dtype=bool)
+      actions = np.zeros(targets.shape, dtype='uint8')
+      in_place = np.zeros(len(targets), dtype=int)
+      in_colour = np.zeros(len(targets), dtype=int)
+      # The games whose rows are in the percepts, the ones solved by the last guesses included
+      playing = np.arange(len(targets))
+      profiling.start_game(first_game, len(targets))
+      for guess in range(num_guesses):
+         percepts = (guess, actions, in_place, in_colour)
 
-            sys.stdout.write(" ?%d\n\r" % in_colour)
-            sys.stdout.flush()
+         profiling.set_turn(guess + 1)
+         try:
+            with profiling.span('agent_function'):
+               actions = np.asarray(player.agent.AgentFunctionBatch(percepts))
+         except Exception as e:
+            self.throwError(str(e))
 
-            sys.stdout.write("   ")
+         playing = playing[in_place != self.code_length]
+         if actions.shape != targets[playing].shape:
+            self.throwError("Error! AgentFunctionBatch from '%s.py' returned an array of shape %s (expecting %s)." % (
+               player.playerFile, actions.shape, targets[playing].shape))
 
-         if in_place == np.prod(np.shape(target)):
-            if self.verbose:
-               if score == 1:
-                  print("Solved in 1 guess!")
-               else:
-                  print("Solved in %d guesses!" % score)
+         if np.any(actions < 0) or np.any(actions >= len(self.colours)):
+            self.throwError("Error! AgentFunctionBatch from '%s.py' returned illegal colour indices (legal indices are 0-%d)."
+                            % (player.playerFile, len(self.colours) - 1))
 
-            return score
+         with profiling.span('evaluate_guess'):
+            in_place, in_colour = evaluate_guess_pairs(actions, targets[playing], len(self.colours))
 
-         if guess >= num_guesses:
+         now_solved = playing[in_place == self.code_length]
+         scores[now_solved] = guess + 1
+         solved[now_solved] = True
+         if np.all(solved):
             break
+      profiling.end_game(first_game, len(targets))
+
+      if telemetry.enabled():
+         colours = np.array(self.colours)
+         for game, (score, target) in enumerate(zip(scores, targets)):
+            telemetry.emit('game_finished', game=first_game + game, score=int(score),
+                           guesses=int(min(score, num_guesses)), solved=bool(solved[game]),
+                           target=''.join(colours[target]), game_time=None)
+
+      return scores
+
+   def run_batch(self, agentFile='agent_human.py', num_guesses=6, num_games=1000, seed=None):
+      """ Plays the games of run() in lockstep with play_batch()
+
+         The targets are drawn exactly as in run(), so agents without randomness score the same.
+
+         :param agentFile: name of the agent file
+         :param num_guesses: max. number of guesses per game
+         :param num_games: total number of games played
+         :param seed: seed for the targets, None for a random seed
+      """
+      profiling.configure(game_settings['profiling'], game_settings['profileGames'], game_settings['profilePath'])
+      if seed is None:
+         seed = int(time.time())
 
       if self.verbose:
-         print("The solution was: ")
-         sys.stdout.write("   ")
-         for c in target:
-            print_colour_char(c)
-         sys.stdout.write("\r\n")
-      return score*2
+         telemetry.emit('run_started', agent=agentFile, batch=True, num_guesses=num_guesses, games=num_games,
+                        seed=seed, num_workers=1)
+
+      rnd = np.random.RandomState(seed)
+
+      try:
+         player = Player(playerFile=agentFile, code_length=self.code_length, colours=list(self.colours),
+                         num_guesses=num_guesses)
+      except Exception as e:
+         self.throwError(str(e))
+
+      I, game_seeds = self.draw_games(rnd, num_games)
+
+      start = time.time()
+      scores = self.play_batch(player, I, num_guesses)
+      end = time.time()
+
+      self.caches = cache_stats(player.agent)
+      profiling.emit_report()
+      telemetry.emit('run_finished', games=num_games, average_score=float(np.mean(scores)), total_time=end - start,
+                     score_occurrences={int(s): int(n) for s, n in zip(*np.unique(scores, return_counts=True))},
+                     caches=self.caches)
+
+   def run_exhaustive(self, agentFile='agent_human.py', num_guesses=6, num_workers=1):
+      """ Plays the agent once against every possible target and prints the exact average score,
+          worst score and score occurrences
 
-   def run(self, agentFile='agent_human.py', num_guesses=6, num_games=1000, seed=None):
+         :param agentFile: name of the agent file
+         :param num_guesses: max. number of guesses per game
+         :param num_workers: number of worker processes, 1 to play in this process
+
+         :return: a numpy array of game scores, one per target in feedback.all_codes() order
+      """
+      profiling.configure(game_settings['profiling'], game_settings['profileGames'], game_settings['profilePath'])
+      targets = all_codes(self.code_length, len(self.colours))
 
       if self.verbose:
-         print("Game play:")
-         print("  Num guesses:      %d" % num_guesses)
-         print("  Num rounds:       %d" % num_games)
+         telemetry.emit('run_started', agent=agentFile, exhaustive=True, num_guesses=num_guesses,
+                        games=len(targets), num_workers=num_workers)
+
+      shards = [(self.code_length, len(self.colours), agentFile, num_guesses, first, targets[first:end])
+                for first, end in split_shards(len(targets), num_workers)]
+
+      start = time.time()
+      if num_workers > 1:
+         # Forked workers start with a copy of the sink's buffer, which they would write out again
+         telemetry.get_sink().flush()
+         with multiprocessing.Pool(processes=num_workers) as pool:
+            scores, caches = zip(*pool.map(play_exhaustive_shard, shards))
+      else:
+         scores, caches = zip(play_exhaustive_shard(shards[0]))
+      scores = np.concatenate(scores)
+      end = time.time()
+
+      self.caches = merge_cache_stats(caches)
+      profiling.emit_report()
+      telemetry.emit('run_finished', games=len(targets), exhaustive=True, average_score=float(np.mean(scores)),
+                     worst_score=int(np.max(scores)), unsolved=int(np.sum(scores > num_guesses)), total_time=end - start,
+                     score_occurrences={int(s): int(n) for s, n in zip(*np.unique(scores, return_counts=True))},
+                     caches=self.caches)
+      return scores
+
+   def run(self, agentFile='agent_human.py', num_guesses=6, num_games=1000, seed=None, num_workers=1):
+      profiling.configure(game_settings['profiling'], game_settings['profileGames'], game_settings['profilePath'])
 
       if seed is None:
          seed = int(time.time())
 
+      if self.verbose:
+         telemetry.emit('run_started', agent=agentFile, num_guesses=num_guesses, games=num_games, seed=seed,
+                        num_workers=num_workers)
+
       rnd = np.random.RandomState(seed)
 
+      if num_workers > 1:
+         return self.run_parallel(agentFile=agentFile, num_guesses=num_guesses, num_games=num_games, rnd=rnd,
+                                  num_workers=num_workers)
+
       try:
          player = Player(playerFile=agentFile, code_length=self.code_length, colours=list(self.colours),
                          num_guesses=num_guesses)
       except Exception as e:
          self.throwError(str(e))
 
-      all_boards = (num_games, self.code_length)
-
       self.colours = np.array(self.colours)
 
-      I = rnd.randint(0, len(self.colours), size=(all_boards))
+      I, game_seeds = self.draw_games(rnd, num_games)
 
       score = 0
       game_count = 0
@@ -261,11 +498,11 @@ class MastermindGame:
       score_occurrences = {}
 
       for i in I:
-         if self.verbose:
-            print("Round %d/%d" % (game_count + 1, len(I)))
+         telemetry.emit('game_started', game=game_count, num_games=len(I))
 
+         seed_game(game_seeds[game_count])
          start = time.time()
-         game_score = self.play(player, target=self.colours[i], num_guesses=num_guesses)
+         game_score = self.play(player, target=self.colours[i], num_guesses=num_guesses, game=game_count)
          score += game_score
 
          # Update the score occurrences dictionary
@@ -276,19 +513,67 @@ class MastermindGame:
 
          end = time.time()
          game_count += 1
-         print("Average score after game %d: %.2f" % (game_count, score / (game_count)))
          tot_time += end - start
 
-         if game_count < num_games:
-            avg_time = tot_time / game_count
-            print("Average running time per game %s." % (time_to_str(avg_time)))
-            print("Time remaining %s." % (time_to_str(avg_time * (num_games - game_count))))
-            print("Expected total running time %s." % (time_to_str(avg_time * num_games)))
-         else:
-            print("Total running time %s." % (time_to_str(tot_time)))
+         telemetry.emit('run_progress', games=game_count, num_games=num_games, average_score=score / game_count,
+                        average_time=tot_time / game_count, total_time=tot_time)
+
+      self.caches = cache_stats(player.agent)
+      profiling.emit_report()
+      telemetry.emit('run_finished', games=game_count, score_occurrences=score_occurrences, caches=self.caches)
+
+   def run_parallel(self, agentFile, num_guesses, num_games, rnd, num_workers):
+      """ Plays the games of run() across a pool of worker processes
 
-      # Print the score occurrences dictionary
-      print("Score Occurrences:", score_occurrences)
+         The targets are drawn exactly as in the sequential run and every game is seeded on its own,
+         so the same seed gives the same scores for any number of workers.
+
+         :param agentFile: name of the agent file
+         :param num_guesses: max. number of guesses per game
+         :param num_games: total number of games played
+         :param rnd: the RandomState seeded in run()
+         :param num_workers: number of worker processes
+      """
+
+      I, game_seeds = self.draw_games(rnd, num_games)
+
+      shards = [(self.code_length, len(self.colours), agentFile, num_guesses, I[first:end], game_seeds[first:end])
+                for first, end in split_shards(num_games, num_workers)]
+
+      score = 0
+      game_count = 0
+      tot_time = 0
+
+      # Create a dictionary to store the occurrences of each score
+      score_occurrences = {}
+      caches = []
+
+      start = time.time()
+      # Forked workers start with a copy of the sink's buffer, which they would write out again
+      telemetry.get_sink().flush()
+      with multiprocessing.Pool(processes=num_workers) as pool:
+         # imap hands back the shards in order, so the merge is the same as a sequential run
+         for results, shard_caches in pool.imap(play_shard, shards):
+            caches.append(shard_caches)
+            for game_score, game_time in results:
+               score += game_score
+
+               # Update the score occurrences dictionary
+               if game_score in score_occurrences:
+                  score_occurrences[game_score] += 1
+               else:
+                  score_occurrences[game_score] = 1
+
+               game_count += 1
+               tot_time += game_time
+
+            telemetry.emit('run_progress', games=game_count, num_games=num_games, average_score=score / game_count)
+
+      end = time.time()
+      self.caches = merge_cache_stats(caches)
+      profiling.emit_report()
+      telemetry.emit('run_finished', games=game_count, average_time=tot_time / game_count, total_time=end - start,
+                     score_occurrences=score_occurrences, caches=self.caches)
 
 
 if __name__ == "__main__":
@@ -297,10 +582,21 @@ if __name__ == "__main__":
                          num_colours=game_settings['numberOfColours'],
                          verbose=game_settings['verbose'])
 
-   game.run(agentFile=game_settings['agentFile'],
-         num_guesses=game_settings['maxNumberOfGuesses'],
-         num_games=game_settings['totalNumberOfGames'],
-         seed=game_settings['seed'])
+   if game_settings['exhaustiveEvaluation']:
+      game.run_exhaustive(agentFile=game_settings['agentFile'],
+            num_guesses=game_settings['maxNumberOfGuesses'],
+            num_workers=game_settings['numberOfWorkers'])
+   elif game_settings['batchSimulation']:
+      game.run_batch(agentFile=game_settings['agentFile'],
+            num_guesses=game_settings['maxNumberOfGuesses'],
+            num_games=game_settings['totalNumberOfGames'],
+            seed=game_settings['seed'])
+   else:
+      game.run(agentFile=game_settings['agentFile'],
+            num_guesses=game_settings['maxNumberOfGuesses'],
+            num_games=game_settings['totalNumberOfGames'],
+            seed=game_settings['seed'],
+            num_workers=game_settings['numberOfWorkers'])
 
 
 
@@ -1,23 +1,27 @@
-import collections
-import itertools
 import random
 
 import numpy as np
 
+import telemetry
+from feedback import (code_to_index, decode_feedback, encode_feedback, index_to_code, partition_entropy,
+                      shared_code_space, shared_feedback_table)
+from settings import game_settings
+
 
 class MastermindAgent():
     def __init__(self, code_length, colours, num_guesses):
         self.code_length = code_length
         self.colours = colours
         self.num_guesses = num_guesses
-        self.all_codes = [''.join(p) for p in itertools.product(colours, repeat=code_length)]
-        self.remaining_guesses = self.all_codes.copy()
+        self.feedback_table = shared_feedback_table(code_length, len(colours), game_settings['feedbackCacheDir'])
+        self.all_codes = shared_code_space(code_length, len(colours))[0]
+        self.remaining_guesses = self.all_codes
 
     def AgentFunction(self, percepts):
         guess_counter, last_guess, in_place, in_colour = percepts
         if guess_counter == 0:
-            self.remaining_guesses = self.all_codes.copy()
-            guess = random.choice(self.remaining_guesses)  # Initial random guess
+            self.remaining_guesses = self.all_codes
+            guess = index_to_code(random.choice(self.remaining_guesses), self.colours, self.code_length)  # Initial random guess
             # guess = ['B', 'G', 'R', 'R', 'G']
 
             # Generate a first guess with four distinct colors (one color repeated)
@@ -32,70 +36,43 @@ class MastermindAgent():
             return list(guess)
 
         # Remove guesses that don't match the feedback
-        self.remaining_guesses = [guess for guess in self.remaining_guesses if
-                                  self.CompareFeedback(guess, last_guess, in_place, in_colour)]
+        last_guess = code_to_index(last_guess, self.colours)
+        feedback = self.feedback_table.row(last_guess, self.remaining_guesses)
+        self.remaining_guesses = self.remaining_guesses[feedback == encode_feedback(in_place, in_colour,
+                                                                                    self.code_length)]
 
-        print("Possible Codes Remaining", len(self.remaining_guesses))
-        best_guess = None
-        max_entropy = -float('inf')
-        min_entropy = 100;
+        telemetry.emit('candidates_filtered', turn=guess_counter, remaining=len(self.remaining_guesses))
         sample_size = 100  # Adjust this value based on your needs
-        feedback_distribution_max = collections.defaultdict(int)
-        feedback_distribution_min = collections.defaultdict(int)
-
-        max_guess_count = 0
-        min_guess_count = 0
-
-        # Sample from remaining guesses
-        sampled_remaining_guesses = random.sample(self.remaining_guesses, min(sample_size, len(self.remaining_guesses)))
-        guess_count = 0
-        # Iterate through all possible remaining guesses
-        for guess in self.remaining_guesses:
-            guess_count += 1
-            feedback_distribution = collections.defaultdict(int)
-
-            # Iterate through sampled remaining solutions to calculate feedback distribution
-            for sampled_guess in sampled_remaining_guesses:
-                in_place_guess, in_colour_guess = self.EvaluateFeedback(guess, sampled_guess)
-                feedback_distribution[(in_place_guess, in_colour_guess)] += 1
 
-            # Calculate entropy
-            # total_feedback = sum(feedback_distribution.values())
+        # Score against every remaining solution, or a sample of them when exact entropy is off
+        if game_settings['exactEntropy']:
+            sampled_remaining_guesses = self.remaining_guesses
+        else:
+            sampled_remaining_guesses = np.array(random.sample(list(self.remaining_guesses),
+                                                               min(sample_size, len(self.remaining_guesses))))
 
-            # Sum of all values would be the same as the number of sampled_remaining_guesses
-            total_feedback = len(sampled_remaining_guesses)
+        # Feedback distribution of every remaining guess in one batched histogram
+        counts = self.feedback_table.partition_counts(self.remaining_guesses, sampled_remaining_guesses)
 
-            # print(guess_count, ":", feedback_distribution)
+        #Shannon's Entropy
+        entropies = partition_entropy(counts)
 
-            #Shannon's Entropy
-            entropy = -sum(
-                count / total_feedback * np.log2(count / total_feedback) for count in feedback_distribution.values())
+        max_guess_count = int(np.argmax(entropies))
+        min_guess_count = int(np.argmin(entropies))
+        best_guess = self.remaining_guesses[max_guess_count]
 
-            # Update best guess if this guess has higher entropy
-            if entropy > max_entropy:
-                max_entropy = entropy
-                best_guess = guess
-                feedback_distribution_max = feedback_distribution
-                max_guess_count = guess_count
+        if telemetry.enabled():
+            telemetry.emit('agent_message', text="Highest entropy guess: %d %s" % (
+                max_guess_count + 1, self.FeedbackDistribution(counts[max_guess_count])))
+            telemetry.emit('agent_message', text="Lowest entropy guess: %d %s" % (
+                min_guess_count + 1, self.FeedbackDistribution(counts[min_guess_count])))
+        return index_to_code(best_guess, self.colours, self.code_length)
 
-            if entropy < min_entropy:
-                min_entropy = entropy
-                feedback_distribution_min = feedback_distribution
-                min_guess_count = guess_count
-
-        print("Highest entropy guess:", max_guess_count, feedback_distribution_max)
-        print("Lowest entropy guess:", min_guess_count, feedback_distribution_min)
-        return list(best_guess)
+    def FeedbackDistribution(self, counts):
+        return {decode_feedback(f, self.code_length): int(counts[f]) for f in np.flatnonzero(counts)}
 
     def EvaluateFeedback(self, code, last_code):
-        code_array = np.array(list(code))
-        last_code_array = np.array(list(last_code))
-
-        place = np.sum(code_array == last_code_array)
-        common = collections.Counter(code) & collections.Counter(last_code)
-        colour = sum(common.values()) - place
-
-        return place, colour
+        return decode_feedback(self.feedback_table.lookup(code, last_code), self.code_length)
 
     def CompareFeedback(self, code, last_code, last_in_place, last_in_colour):
         place, colour = self.EvaluateFeedback(code, last_code)
@@ -2,12 +2,46 @@ __author__ = "Jay Lee"
 __organization__ = "COSC343/AIML402, University of Otago"
 __email__ = "leeja744@student.otago.ac.nz"
 
-import collections
-import itertools
 import random
+import time
 
 import numpy as np
 
+import profiling
+import telemetry
+from bitset import MIN_BITSET_DENSITY, PartitionIndex, bitset_indices, to_bitset
+from cache import LRUCache
+from feedback import (code_indices, code_to_index, codes_from_indices, decode_feedback, encode_feedback,
+                      feedbacks_per_total, index_to_code, num_feedbacks, partition_entropy, shared_code_space,
+                      shared_feedback_table, stream_consistent, total_matches)
+from first_guess import opening_guess
+from lookahead import Lookahead
+from opening_book import OpeningBook
+from scoring import ANYTIME_BLOCK_GUESSES, SCORE_BLOCK_GUESSES, get_score_bound, get_scorer
+from settings import game_settings
+from symmetry import MIN_SYMMETRY_CANDIDATES, orbit_representatives, symmetry_classes
+
+GUESS_POOLS = ['candidates', 'all']
+
+
+def strategy_name():
+    """
+    Names the strategy selected by the settings, the key of cached opening books and decision trees.
+
+    :return: the guess scorer, suffixed with the guess pool when guesses are not only candidates and with
+             the lookahead depth and width when searching ahead
+    """
+    if game_settings['guessPool'] not in GUESS_POOLS:
+        raise RuntimeError("Error! Unknown guess pool '%s' (valid pools are %s)" % (game_settings['guessPool'],
+                                                                                   GUESS_POOLS))
+    name = game_settings['guessScorer']
+    if game_settings['guessPool'] != 'candidates':
+        name += "_%s" % game_settings['guessPool']
+    if game_settings['lookaheadDepth'] > 1:
+        name += "_d%dw%d" % (game_settings['lookaheadDepth'], game_settings['lookaheadWidth'])
+    return name
+
+
 class MastermindAgent:
     """
     A class that encapsulates the code dictating the
@@ -23,10 +57,55 @@ class MastermindAgent:
         a list of colours represented as characters
     num_guesses : int
         the max. number of guesses per game
-    all_codes : list of strings
-        a list of all possible codes
-    remaining_guesses : list of strings
-        a list of all possible codes after each guess
+    feedback_table : FeedbackTable
+        the precomputed feedback between every pair of codes
+    streaming : bool
+        whether the code space is too large to materialise and is generated in chunks instead
+    all_codes : numpy array or None
+        the indices of all possible codes, None when streaming
+    remaining_guesses : numpy array or None
+        the indices of all possible codes after each guess, None before the first filter when streaming
+    all_bits : numpy array or None
+        the bitset of all possible codes, None when streaming
+    remaining_bits : numpy array or None
+        the bitset of all possible codes after each guess, None when streaming or once fewer than
+        MIN_BITSET_DENSITY of the codes remain
+    partition_index : PartitionIndex
+        the feedback partitions of recently used guesses as bitsets
+    exact_entropy : bool
+        whether guesses are scored against all remaining codes instead of a sample
+    scorer : function
+        the guess scorer from scoring.SCORERS, maps feedback partition sizes to scores
+    first_guess : int
+        index of the guess played first when there is an opening book or the agent is streaming
+    opening_book : OpeningBook or None
+        the precomputed first and second guesses, None to open with a random guess
+    symmetry_reduction : bool
+        whether only one guess per class of guesses equivalent under the candidates' symmetries is scored
+    guess_pool : str
+        "candidates" to only guess codes still consistent with the feedback, "all" to also consider the others
+    score_bound : function
+        upper bound of the scorer from scoring.SCORE_BOUNDS, used to prune guesses outside the candidates
+    pool_colour_counts : numpy array or None
+        the distinct colour counts of all codes, None unless guessing from all codes
+    pool_groups : numpy array or None
+        the row of pool_colour_counts of every code, None unless guessing from all codes
+    lookahead : Lookahead or None
+        the search choosing guesses by expected guesses left, None to play the best scoring guess
+    history : list of tuple
+        the (guess index, encoded feedback) of every guess of the current game
+    decision_cache : LRUCache
+        the guess chosen for every recent history, shared by all games the agent plays
+    batch_nodes : numpy array
+        the row of batch_positions of every game played in lockstep
+    batch_positions : list of tuple
+        the distinct (history, candidates) of the games played in lockstep
+    turn_time_budget : float or None
+        the seconds a guess may take to choose before the best one found so far is played, None for no limit
+    deadline : float or None
+        the time.perf_counter() by which the current guess must be chosen, None outside a timed turn
+    search_truncated : bool
+        whether the last guess search was cut short by the deadline
 
     Methods
     -------
@@ -34,7 +113,7 @@ class MastermindAgent:
         Initializes the MastermindAgent with code_length, colours, and num_guesses
 
     generate_all_codes(self)
-        Generates all possible codes using itertools.product
+        Generates the indices of all possible codes
 
     reset_remaining_guesses(self)
         Resets the list of remaining guesses to all possible codes
@@ -42,6 +121,9 @@ class MastermindAgent:
     AgentFunction(self, percepts)
         Returns the next guess of the colours on the board based on the current game state
 
+    AgentFunctionBatch(self, percepts)
+        Returns the next guesses of many games played in lockstep
+
     evaluate_feedback(self, code, last_code)
         Compares two codes and calculates the in-place and in-color counts
 
@@ -51,8 +133,38 @@ class MastermindAgent:
     filter_remaining_codes(self, last_guess, in_place, in_colour)
         Filters remaining guesses based on feedback
 
+    filter_candidates(self, candidates, guess, feedback, bits=None)
+        Filters candidates by the feedback of a guess, by bitwise AND while they are dense
+
+    turn_deadline(self)
+        Returns the time by which the current guess must be chosen
+
+    past_deadline(self)
+        Checks whether the turn's deadline has passed, marking the search as cut short if it has
+
     find_best_guess(self)
-        Finds the best guess based on entropy
+        Finds the best guess for the current game based on the agent's scorer
+
+    best_guess(self, history, candidates)
+        Finds the best guess for a position, cached by its history
+
+    choose_guess(self, candidates)
+        Finds the best guess for a set of candidates, by its score or by lookahead
+
+    rank_guesses(self, candidates, count)
+        Finds the best scoring guesses for a set of candidates, from the candidates or from all codes
+
+    search_pool(self, candidates, best_guess, best_score, colour_classes, position_classes)
+        Looks for a code outside the candidates that scores higher than the best candidate
+
+    colour_count_bounds(self, colour_counts, candidates)
+        Bounds the score of guesses from their colour counts
+
+    score_guesses_anytime(self, guesses, secrets, count)
+        Scores the most promising guesses first until the turn's deadline
+
+    score_guesses(self, guesses, secrets)
+        Scores guesses by how they partition the secrets
 
     calculate_entropy(self, guess, sampled_remaining_guesses)
         Calculates the entropy of a guess based on sampled remaining guesses
@@ -69,22 +181,66 @@ class MastermindAgent:
         self.code_length = code_length
         self.colours = colours
         self.num_guesses = num_guesses
+        self.feedback_table = shared_feedback_table(code_length, len(colours), game_settings['feedbackCacheDir'])
+        self.streaming = self.feedback_table.num_codes > game_settings['streamingThreshold']
         self.all_codes = self.generate_all_codes()
-        self.remaining_guesses = self.all_codes.copy()
+        self.remaining_guesses = self.all_codes
+        self.all_bits = None if self.streaming else to_bitset(self.all_codes, self.feedback_table.num_codes)
+        self.remaining_bits = self.all_bits
+        self.partition_index = PartitionIndex(self.feedback_table, game_settings['partitionIndexSize'])
+        self.exact_entropy = game_settings['exactEntropy']
+        self.scorer = get_scorer(game_settings['guessScorer'])
+        self.symmetry_reduction = game_settings['symmetryReduction']
+        # Guessing from all codes needs the whole code space in memory, streaming agents only guess candidates
+        self.guess_pool = 'candidates' if self.streaming else game_settings['guessPool']
+        self.score_bound = get_score_bound(game_settings['guessScorer'])
+        self.pool_colour_counts, self.pool_groups = None, None
+        if self.guess_pool == 'all':
+            # Codes with the same colour counts share a score bound, so they are pruned together
+            self.pool_colour_counts, self.pool_groups = np.unique(self.feedback_table.count_rows(self.all_codes),
+                                                                  axis=0, return_inverse=True)
+        self.lookahead = None
+        if game_settings['lookaheadDepth'] > 1:
+            self.lookahead = Lookahead(self.feedback_table, self.rank_guesses, self.past_deadline,
+                                       game_settings['lookaheadDepth'], game_settings['lookaheadWidth'],
+                                       game_settings['lookaheadMemoSize'])
+        self.history = []
+        self.decision_cache = LRUCache(game_settings['decisionCacheSize'])
+        self.batch_nodes = None
+        self.batch_positions = None
+        self.turn_time_budget = game_settings['turnTimeBudget']
+        self.deadline = None
+        self.search_truncated = False
+        self.first_guess = opening_guess(code_length, colours)
+        self.opening_book = None
+        # The book is built over the whole code space, so streaming agents only play its first guess
+        if game_settings['openingBook'] and not self.streaming:
+            self.opening_book = OpeningBook(self.feedback_table, self.choose_guess, strategy_name(),
+                                            first_guess=self.first_guess,
+                                            cache_dir=game_settings['feedbackCacheDir'])
+            # Every game filters by the opening guesses, so keep their partitions indexed
+            second_guesses = self.opening_book.second_guesses
+            for guess in [self.opening_book.first_guess] + list(np.unique(second_guesses[second_guesses >= 0])):
+                self.partition_index.index(guess)
 
     def generate_all_codes(self):
         """
-        Generates all possible codes using itertools.product.
+        Returns the indices of all possible codes, in the order of itertools.product, shared read-only
+        with the other agents of the configuration.
 
-        :return: list of strings representing all possible codes
+        :return: numpy array of code indices, None when streaming
         """
-        return [''.join(combination) for combination in itertools.product(self.colours, repeat=self.code_length)]
+        if self.streaming:
+            return None
+        return shared_code_space(self.code_length, len(self.colours))[0]
 
     def reset_remaining_guesses(self):
         """
-        Resets the list of remaining guesses to all possible codes.
+        Resets the list of remaining guesses to all possible codes. Filtering always builds a new
+        array, so the shared array of all codes is never modified.
         """
-        self.remaining_guesses = self.all_codes.copy()
+        self.remaining_guesses = self.all_codes
+        self.remaining_bits = self.all_bits
 
     def AgentFunction(self, percepts):
         """
@@ -97,6 +253,11 @@ class MastermindAgent:
 
         if guess_counter == 0:
             self.reset_remaining_guesses()
+            self.history = []
+            if self.opening_book is not None:
+                return index_to_code(self.opening_book.first_guess, self.colours, self.code_length)
+            if self.streaming:
+                return index_to_code(self.first_guess, self.colours, self.code_length)
             distinct_colors = random.sample(self.colours, 3)
             repeated_color1 = random.choice(distinct_colors)
             repeated_color2 = random.choice(distinct_colors)
@@ -106,32 +267,80 @@ class MastermindAgent:
             guess = distinct_colors
             return list(guess)
 
+        last_guess = code_to_index(last_guess, self.colours)
+        feedback = encode_feedback(in_place, in_colour, self.code_length)
+        self.history.append((last_guess, feedback))
         self.remaining_guesses = self.filter_remaining_codes(last_guess, in_place, in_colour)
-        print("Possible Codes Remaining:", len(self.remaining_guesses))
-        best_guess = self.find_best_guess()
-        return list(best_guess)
+        telemetry.emit('candidates_filtered', turn=guess_counter, remaining=len(self.remaining_guesses))
+        if guess_counter == 1 and self.opening_book is not None and last_guess == self.opening_book.first_guess:
+            # The second guess only depends on the feedback to the fixed first guess
+            best_guess = self.opening_book.second_guess(feedback)
+        else:
+            best_guess = self.find_best_guess()
+        return index_to_code(best_guess, self.colours, self.code_length)
+
+    def AgentFunctionBatch(self, percepts):
+        """
+        Returns the next guesses of many games played in lockstep. Games with the same guess and
+        feedback history share their candidates and their next guess, so every distinct position
+        is filtered and searched once per turn. Every game opens with first_guess. Games solved by their
+        last guess are dropped from the batch, and their positions are neither filtered nor searched.
+
+        :param percepts: a tuple (guess_counter, last_guesses, in_place, in_colour), last_guesses being a
+                         (G, code_length) array of colour indices and in_place, in_colour arrays of G counts
+        :return: a (g, code_length) uint8 array of the colour indices of the next guesses of the g games
+                 not solved by their last guess, in the order of the percepts
+        """
+        guess_counter, last_guesses, in_place, in_colour = percepts
+        num_colours = len(self.colours)
+
+        if guess_counter == 0:
+            self.batch_nodes = np.zeros(len(last_guesses), dtype=np.int64)
+            self.batch_positions = [((), self.all_codes)]
+            return codes_from_indices(np.full(len(last_guesses), self.first_guess), self.code_length, num_colours)
+
+        playing = np.asarray(in_place) != self.code_length
+        if not np.any(playing):
+            self.batch_nodes = self.batch_nodes[playing]
+            return np.zeros((0, self.code_length), dtype=np.uint8)
+        last_guesses = code_indices(np.asarray(last_guesses)[playing], num_colours)
+        feedback = np.asarray(in_place)[playing] * (self.code_length + 1) + np.asarray(in_colour)[playing]
+        positions, self.batch_nodes = np.unique(np.stack([self.batch_nodes[playing], last_guesses, feedback], axis=1),
+                                                axis=0, return_inverse=True)
+        self.batch_nodes = self.batch_nodes.ravel()
+
+        next_positions, guesses = [], []
+        for node, guess, f in positions:
+            history, candidates = self.batch_positions[node]
+            history = history + ((int(guess), int(f)),)
+            # Only the position every game starts from holds no candidates, so history is this one guess
+            candidates, _ = self.filter_candidates(candidates, int(guess), int(f))
+            next_positions.append((history, candidates))
+            if guess_counter == 1 and self.opening_book is not None and guess == self.opening_book.first_guess:
+                guesses.append(self.opening_book.second_guess(f))
+            else:
+                # Every position gets its own budget, as it would in a game of its own
+                guesses.append(self.best_guess(history, candidates))
+        self.batch_positions = next_positions
+
+        return codes_from_indices(np.array(guesses)[self.batch_nodes], self.code_length, num_colours)
 
     def evaluate_feedback(self, code, last_code):
         """
-        Compares two codes and calculates the in-place and in-color counts.
+        Looks up the in-place and in-color counts of two codes in the feedback table.
 
-        :param code: the current code to evaluate
-        :param last_code: the previous guess
+        :param code: index of the current code to evaluate
+        :param last_code: index of the previous guess
         :return: a tuple (in_place, in_colour) indicating the feedback counts
         """
-        code_array = np.array(list(code))
-        last_code_array = np.array(list(last_code))
-        in_place = np.sum(code_array == last_code_array)
-        common_colours = collections.Counter(code) & collections.Counter(last_code)
-        in_colour = sum(common_colours.values()) - in_place
-        return in_place, in_colour
+        return decode_feedback(self.feedback_table.lookup(code, last_code), self.code_length)
 
     def compare_feedback(self, code, last_code, last_in_place, last_in_colour):
         """
         Compares feedback between two codes to check if it matches the previous feedback.
 
-        :param code: the current code to compare
-        :param last_code: the previous guess
+        :param code: index of the current code to compare
+        :param last_code: index of the previous guess
         :param last_in_place: in-place count from previous feedback
         :param last_in_colour: in-colour count from previous feedback
         :return: True if the feedback matches, False otherwise
@@ -141,51 +350,268 @@ class MastermindAgent:
 
     def filter_remaining_codes(self, last_guess, in_place, in_colour):
         """
-        Filters remaining guesses based on feedback.
+        Filters remaining guesses based on feedback and updates the bitset of remaining guesses.
 
-        :param last_guess: the previous guess
+        :param last_guess: index of the previous guess
         :param in_place: in-place count from previous feedback
         :param in_colour: in-colour count from previous feedback
-        :return: a list of remaining guesses after filtering
+        :return: numpy array of the indices of remaining guesses after filtering
+        """
+        feedback = encode_feedback(in_place, in_colour, self.code_length)
+        remaining, self.remaining_bits = self.filter_candidates(self.remaining_guesses, last_guess, feedback,
+                                                                self.remaining_bits)
+        return remaining
+
+    @profiling.timed('filter_remaining_codes')
+    def filter_candidates(self, candidates, guess, feedback, bits=None):
+        """
+        Filters candidates by the feedback of a guess, for a single game or a position of games played
+        in lockstep.
+
+        While at least MIN_BITSET_DENSITY of the codes remain and their bitset is given this is a bitwise
+        AND with the partition of the feedback, whose cost does not depend on the number of candidates.
+        Every guess filtered this way is indexed, so guesses played again in later games (the opening
+        book's, or any the decision cache replays) reuse their partitions. Sparser sets are filtered by
+        looking the feedback of the candidates up in the feedback table. When streaming, the first filter
+        generates the code space chunk by chunk and keeps the survivors.
+
+        :param candidates: numpy array of the indices of candidate codes, None for all codes when streaming
+        :param guess: index of the guess
+        :param feedback: the encoded feedback to the guess
+        :param bits: bitset of the candidates, None to filter by looking feedback up
+        :return: a tuple (candidates, bits) of the candidates consistent with the feedback and their
+                 bitset, None once they are sparse
+        """
+        num_codes = self.feedback_table.num_codes
+        if candidates is None:
+            profiling.count('candidates_examined', num_codes)
+            return stream_consistent(self.code_length, len(self.colours), [(guess, feedback)],
+                                     game_settings['codeChunkSize']), None
+
+        profiling.count('candidates_examined', len(candidates))
+        if bits is not None and len(candidates) >= MIN_BITSET_DENSITY * num_codes:
+            bits = bits & self.partition_index.partition(guess, feedback)
+            return bitset_indices(bits, num_codes), bits
+        # Candidate sets only shrink, so once they are sparse the bitset is dropped until the next game
+        return candidates[self.feedback_table.row(guess, candidates) == feedback], None
+
+    def turn_deadline(self):
+        """
+        Returns the time by which the current guess must be chosen.
+
+        :return: a time.perf_counter() value, None without a turn time budget
         """
-        return [guess for guess in self.remaining_guesses if self.compare_feedback(guess, last_guess, in_place, in_colour)]
+        if self.turn_time_budget is None:
+            return None
+        return time.perf_counter() + self.turn_time_budget
+
+    def past_deadline(self):
+        """
+        Checks whether the turn's deadline has passed, and if it has marks the search as cut short.
+
+        :return: True if the search must stop, always False outside a timed turn
+        """
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            self.search_truncated = True
+            return True
+        return False
 
     def find_best_guess(self):
         """
-        Finds the best guess based on entropy.
+        Finds the best guess for the current game based on the agent's scorer.
+
+        :return: index of the best guess
+        """
+        return self.best_guess(tuple(self.history), self.remaining_guesses)
+
+    @profiling.timed('best_guess')
+    def best_guess(self, history, candidates):
+        """
+        Finds the best guess for a position based on the agent's scorer, within the turn time budget.
+        Exact choices are cached by the guess and feedback history, so positions reached in earlier games
+        are a dictionary lookup.
 
-        :return: the best guess based on entropy
+        :param history: tuple of the (guess index, encoded feedback) of every guess so far
+        :param candidates: numpy array of the indices of the codes consistent with the history
+        :return: index of the best guess
         """
-        best_guess = None
-        max_entropy = -float('inf')
+        if self.exact_entropy:
+            # The same history always leaves the same candidates, so earlier games' choices can be replayed
+            best_guess = self.decision_cache.get(history)
+            if best_guess is None:
+                self.search_truncated = False
+                self.deadline = self.turn_deadline()
+                try:
+                    best_guess = self.choose_guess(candidates)
+                finally:
+                    self.deadline = None
+                # A search cut short by the deadline may not have found the best guess
+                if not self.search_truncated:
+                    self.decision_cache.put(history, best_guess)
+            return best_guess
+
         sample_size = 100
-        sampled_remaining_guesses = random.sample(self.remaining_guesses, min(sample_size, len(self.remaining_guesses)))
+        secrets = np.array(random.sample(list(candidates), min(sample_size, len(candidates))))
+
+        scores = self.score_guesses(candidates, secrets)
+        return candidates[np.argmax(scores)]
 
-        for guess in self.remaining_guesses:
-            entropy = self.calculate_entropy(guess, sampled_remaining_guesses)
+    def choose_guess(self, candidates):
+        """
+        Finds the best guess for a set of candidates: the best scoring one, or with lookahead the
+        one leaving the fewest expected guesses.
 
-            if entropy > max_entropy:
-                max_entropy = entropy
-                best_guess = guess
+        :param candidates: numpy array of the indices of candidate codes
+        :return: index of the best guess
+        """
+        if self.lookahead is not None:
+            return self.lookahead.choose_guess(candidates)
+        return self.rank_guesses(candidates, 1)[0]
 
+    def rank_guesses(self, candidates, count):
+        """
+        Finds the best scoring guesses among candidates, scoring each against all of them. With symmetry
+        reduction only the first candidate of each class of equivalent guesses is scored, which ranks
+        the same guesses first as scoring them all. When guessing from all codes, a code outside the
+        candidates is ranked first only if it scores strictly higher than every candidate.
+
+        :param candidates: numpy array of the indices of candidate codes
+        :param count: the number of guesses to return
+        :return: numpy array of the indices of at most count guesses, best first
+        """
+        guesses = candidates
+        colour_classes, position_classes = None, None
+        if self.symmetry_reduction and len(candidates) >= MIN_SYMMETRY_CANDIDATES:
+            codes = self.feedback_table.code_rows(candidates)
+            colour_classes, position_classes = symmetry_classes(codes, candidates, len(self.colours))
+            guesses = candidates[orbit_representatives(codes, colour_classes, position_classes, len(self.colours))]
+        if self.deadline is None:
+            scores = self.score_guesses(guesses, candidates)
+        else:
+            scores = self.score_guesses_anytime(guesses, candidates, count)
+        order = np.argsort(-scores, kind='stable')[:count]
+        order = order[scores[order] > -np.inf]
+        ranked = guesses[order]
+        if self.guess_pool == 'all':
+            best = self.search_pool(candidates, ranked[0], scores[order[0]], colour_classes, position_classes)
+            if best != ranked[0]:
+                ranked = np.concatenate([[best], ranked[:count - 1]]).astype(ranked.dtype)
+        return ranked
+
+    def search_pool(self, candidates, best_guess, best_score, colour_classes, position_classes):
+        """
+        Looks for a code outside the candidates that scores higher than the best candidate.
+
+        Every code is first bounded by how its colour counts alone split the candidates by total
+        matching pegs. Codes whose bound cannot beat the best score so far are never scored, the
+        others are scored in decreasing order of their bound, SCORE_BLOCK_GUESSES at a time, or
+        ANYTIME_BLOCK_GUESSES at a time until the deadline in a timed turn.
+
+        :param candidates: numpy array of the indices of candidate codes
+        :param best_guess: index of the best candidate
+        :param best_score: score of the best candidate
+        :param colour_classes: the interchangeable colours of the candidates, None without symmetry reduction
+        :param position_classes: the interchangeable positions of the candidates, None without symmetry reduction
+        :return: index of the best guess
+        """
+        if self.past_deadline():
+            return best_guess
+        group_bounds = self.colour_count_bounds(self.pool_colour_counts, candidates)
+
+        # Symmetries of the candidates preserve the bounds, so the surviving codes are closed under them
+        pool = self.all_codes[group_bounds[self.pool_groups] > best_score]
+        pool = pool[~np.isin(pool, candidates, assume_unique=True)]
+        # Reducing thousands of codes to their orbits can take longer than a turn's budget, timed turns score
+        # the pool block by block instead
+        if colour_classes is not None and self.deadline is None and len(pool) > 0:
+            codes = self.feedback_table.code_rows(pool)
+            pool = pool[orbit_representatives(codes, colour_classes, position_classes, len(self.colours))]
+
+        bounds = group_bounds[self.pool_groups[pool]]
+        order = np.argsort(-bounds, kind='stable')
+        pool, bounds = pool[order], bounds[order]
+        block_size = SCORE_BLOCK_GUESSES if self.deadline is None else ANYTIME_BLOCK_GUESSES
+        start = 0
+        while start < len(pool) and bounds[start] > best_score:
+            if self.past_deadline():
+                break
+            block = pool[start:start + block_size]
+            block = block[bounds[start:start + len(block)] > best_score]
+            scores = self.score_guesses(block, candidates)
+            if scores.max() > best_score:
+                best_guess, best_score = block[np.argmax(scores)], scores.max()
+            start += block_size
         return best_guess
 
-    def calculate_entropy(self, guess, sampled_remaining_guesses):
+    def colour_count_bounds(self, colour_counts, candidates):
         """
-        Calculates the entropy of a guess based on sampled remaining guesses.
+        Bounds the score of guesses from how their colour counts alone split the candidates by total
+        matching pegs, which is much cheaper than their feedback partitions.
 
-        :param guess: the guess to calculate entropy for
-        :param sampled_remaining_guesses: a list of sampled remaining guesses
-        :return: the calculated entropy
+        :param colour_counts: a (G, num_colours) array of the colour counts of guesses
+        :param candidates: numpy array of the indices of candidate codes
+        :return: a (G,) array of score upper bounds
+        """
+        totals = total_matches(colour_counts, self.feedback_table.count_rows(candidates))
+        sizes = self.code_length + 1
+        offsets = (np.arange(len(totals)) * sizes)[:, None]
+        coarse = np.bincount((totals + offsets).ravel(), minlength=len(totals) * sizes).reshape(-1, sizes)
+        return self.score_bound(coarse, feedbacks_per_total(self.code_length))
+
+    def score_guesses_anytime(self, guesses, secrets, count):
+        """
+        Scores guesses in decreasing order of their score bound, ANYTIME_BLOCK_GUESSES at a time, until the
+        turn's deadline passes or no guess left can reach the count best scores so far. Guesses whose
+        bound reaches a score tied with the count-th best are still scored, so finishing before the
+        deadline ranks the same guesses first as score_guesses.
+
+        :param guesses: numpy array of the indices of guesses to score
+        :param secrets: numpy array of the indices of possible secrets
+        :param count: the number of best guesses wanted
+        :return: numpy array of scores, -inf for guesses left unscored
         """
-        feedback_distribution = collections.defaultdict(int)
-        total_feedback = len(sampled_remaining_guesses)
+        colour_counts, groups = np.unique(self.feedback_table.count_rows(guesses), axis=0, return_inverse=True)
+        bounds = self.colour_count_bounds(colour_counts, secrets)[groups.ravel()]
+        order = np.argsort(-bounds, kind='stable')
+
+        scores = np.full(len(guesses), -np.inf)
+        threshold = -np.inf
+        for start in range(0, len(order), ANYTIME_BLOCK_GUESSES):
+            if bounds[order[start]] < threshold:
+                break
+            if start > 0 and self.past_deadline():
+                break
+            block = order[start:start + ANYTIME_BLOCK_GUESSES]
+            block = block[bounds[block] >= threshold]
+            scores[block] = self.scorer(self.feedback_table.partition_counts(guesses[block], secrets))
+            if np.count_nonzero(scores > -np.inf) >= count:
+                threshold = np.sort(scores)[-count]
+        return scores
+
+    @profiling.timed('score_guesses')
+    def score_guesses(self, guesses, secrets):
+        """
+        Scores guesses by how they partition the secrets, from batched feedback histograms of
+        SCORE_BLOCK_GUESSES guesses at a time.
 
-        for sampled_guess in sampled_remaining_guesses:
-            in_place_guess, in_colour_guess = self.evaluate_feedback(guess, sampled_guess)
-            feedback_distribution[(in_place_guess, in_colour_guess)] += 1
+        :param guesses: numpy array of the indices of guesses to score
+        :param secrets: numpy array of the indices of possible secrets
+        :return: numpy array of scores, higher is better
+        """
+        scores = np.empty(len(guesses))
+        for start in range(0, len(guesses), SCORE_BLOCK_GUESSES):
+            block = guesses[start:start + SCORE_BLOCK_GUESSES]
+            scores[start:start + len(block)] = self.scorer(self.feedback_table.partition_counts(block, secrets))
+        return scores
 
-        entropy = -sum(
-            count / total_feedback * np.log2(count / total_feedback) for count in feedback_distribution.values())
+    def calculate_entropy(self, guess, sampled_remaining_guesses):
+        """
+        Calculates the entropy of a guess based on sampled remaining guesses.
 
-        return entropy
+        :param guess: index of the guess to calculate entropy for
+        :param sampled_remaining_guesses: numpy array of the indices of sampled remaining guesses
+        :return: the calculated entropy
+        """
+        feedback = self.feedback_table.row(guess, sampled_remaining_guesses)
+        feedback_distribution = np.bincount(feedback, minlength=num_feedbacks(self.code_length))
+        return partition_entropy(feedback_distribution)
@@ -3,11 +3,13 @@ __organization__ = "COSC343/AIML402, University of Otago"
 __email__ = "leeja744@student.otago.ac.nz"
 
 import numpy as np
-import itertools
 import random
-from collections import Counter
 import math
 
+import profiling
+import telemetry
+from feedback import code_to_array, consistent_mask, index_to_code, shared_code_space
+
 
 class MastermindAgent():
     """
@@ -41,32 +43,26 @@ class MastermindAgent():
         self.code_length = code_length
         self.colours = colours
         self.num_guesses = num_guesses
-        self.possible_codes_tuples = list(itertools.product(colours, repeat=code_length))
-        self.possible_codes_arrays = [np.array(inner_tuple) for inner_tuple in self.possible_codes_tuples]
-        self.copied_array = self.possible_codes_arrays[:]
-
-    def match_feedback(self, code, last_guess, in_colour, in_place):
-        # Count the occurrences of each color in 'code' and 'last_guess'
-        code_counts = Counter(code)
-        last_guess_counts = Counter(last_guess)
-
-        # Calculate the overall number of in_place and in_colour colors
-        in_place_count = sum(1 for i in range(len(code)) if code[i] == last_guess[i])
-        in_colour_count = sum(min(code_counts[color], last_guess_counts[color]) for color in set(code))
-
-        # Return True if the calculated counts match the provided in_colour and in_place values, otherwise return False
-        return in_place_count == in_place and in_colour_count - in_place_count == in_colour
+        # Shared read-only with every other agent of the configuration
+        self.all_codes, self.possible_codes, self.possible_codes_counts = shared_code_space(code_length,
+                                                                                            len(colours))
+        self.remaining_guesses = self.all_codes
 
+    @profiling.timed('filter_remaining_codes')
     def filter_possible_codes(self, last_guess, in_colour, in_place):
-        self.copied_array = [code for code in self.copied_array if
-                             self.match_feedback(code, last_guess, in_colour, in_place)]
+        # Score the last guess against all remaining codes at once and keep the consistent ones
+        profiling.count('candidates_examined', len(self.remaining_guesses))
+        mask = consistent_mask(self.possible_codes[self.remaining_guesses], code_to_array(last_guess, self.colours),
+                               in_place, in_colour, len(self.colours),
+                               self.possible_codes_counts[self.remaining_guesses])
+        self.remaining_guesses = self.remaining_guesses[mask]
 
     def calculate_entropy(self, remaining_pool):
         total_remaining_guesses = len(remaining_pool)
         colour_counts = {}
 
-        for guess in self.copied_array:
-            for colour in guess:
+        for guess in remaining_pool:
+            for colour in index_to_code(guess, self.colours, self.code_length):
                 if colour in colour_counts:
                     colour_counts[colour] += 1
                 else:
@@ -88,17 +84,12 @@ class MastermindAgent():
         return entropy
 
     def calculate_entropy_dict(self, remaining_pool):
-        color_counts = {}
-        total_colors = 0
-
-        # Count the occurrences of each color in the remaining pool
-        for guess in remaining_pool:
-            for color in guess:
-                if color in color_counts:
-                    color_counts[color] += 1
-                else:
-                    color_counts[color] = 1
-                total_colors += 1
+        # Count the occurrences of each color in the remaining pool, in order of first appearance
+        pool_colours = self.possible_codes[remaining_pool].ravel()
+        counts = np.bincount(pool_colours, minlength=len(self.colours))
+        _, first_seen = np.unique(pool_colours, return_index=True)
+        color_counts = {self.colours[c]: int(counts[c]) for c in pool_colours[np.sort(first_seen)]}
+        total_colors = len(pool_colours)
 
         # Calculate the probabilities of each color based on the occurrences
         color_probabilities = {color: count / total_colors for color, count in color_counts.items()}
@@ -160,18 +151,19 @@ class MastermindAgent():
         # Create an list of colour caracters. Currently all the guesses are the first colour,
         # 'B' - probably good idea to replace this logic with a better guess
         if guess_counter == 0:
-            self.copied_array = self.possible_codes_arrays[:]
-            # action = random.choice(self.copied_array)
+            self.remaining_guesses = self.all_codes
+            # action = random.choice(self.remaining_guesses)
             action = [self.colours[0]] * 3 + [self.colours[1]] * 2
             return action
         else:
             self.filter_possible_codes(last_guess, in_colour, in_place)
-            print("Possible Codes Remaining", len(self.copied_array))
-            entropy_dict = self.calculate_entropy_dict(self.copied_array)
-            for colour, count in entropy_dict.items():
-                print(colour, count)
+            telemetry.emit('candidates_filtered', turn=guess_counter, remaining=len(self.remaining_guesses))
+            entropy_dict = self.calculate_entropy_dict(self.remaining_guesses)
+            if telemetry.enabled():
+                for colour, count in entropy_dict.items():
+                    telemetry.emit('agent_message', text="%s %s" % (colour, count))
 
-            # action = random.choice(self.copied_array)
+            # action = random.choice(self.remaining_guesses)
 
             highest_entropy_colors = self.select_colours_with_highest_entropy(entropy_dict)
             lowest_entropy_colors = self.select_colours_with_lowest_entropy(entropy_dict)
@@ -189,18 +181,19 @@ class MastermindAgent():
                     action.append(color)
 
             # Fill in the remaining slots with random colors from the remaining pool
+            first_code = index_to_code(self.remaining_guesses[0], self.colours, self.code_length)
             while len(action) < 5:
                 available_colors = set(self.colours) - set(action)
-                remaining_pool_colors = set(self.copied_array[0])
+                remaining_pool_colors = set(first_code)
                 possible_colors = available_colors.intersection(remaining_pool_colors)
 
                 if possible_colors:
                     random_color = random.choice(list(possible_colors))
-                    if all(c in self.copied_array[0] for c in action + [random_color]):
+                    if all(c in first_code for c in action + [random_color]):
                         action.append(random_color)
                 else:
                     random_color = random.choice(list(available_colors))
-                    if all(c in self.copied_array[0] for c in action + [random_color]):
+                    if all(c in first_code for c in action + [random_color]):
                         action.append(random_color)
 
         return action
@@ -0,0 +1,109 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import os
+
+import numpy as np
+
+from cache import atomic_save
+from feedback import num_feedbacks
+
+
+def default_first_guess(code_length, num_colours):
+    """
+    Returns the fixed opening guess: colours in repeated pairs, e.g. BBRRG for 5 pegs.
+
+    :param code_length: the length of the code
+    :param num_colours: the number of colours
+    :return: index of the opening guess
+    """
+    index = 0
+    for position in range(code_length):
+        index = index * num_colours + (position // 2) % num_colours
+    return index
+
+
+class OpeningBook:
+    """
+    The first guess and the best second guess for every feedback to it.
+
+    ...
+
+    Attributes
+    ----------
+    feedback_table : FeedbackTable
+        the feedback table of the game configuration
+    first_guess : int
+        index of the fixed opening guess
+    second_guesses : numpy array
+        index of the second guess for each encoded feedback, -1 for feedback that cannot occur
+
+    Methods
+    -------
+    cache_path(cache_dir, name)
+        Returns the path of the cached book file
+    build(choose_guess)
+        Computes the second guess for every feedback to the first guess
+    second_guess(feedback)
+        Returns the second guess for an encoded feedback
+    """
+
+    def __init__(self, feedback_table, choose_guess, name, first_guess=None, cache_dir=None):
+        """
+        Loads the opening book from the cache, building and saving it first if needed.
+
+        :param feedback_table: the feedback table of the game configuration
+        :param choose_guess: function mapping an array of candidate indices to the index of the guess to play
+        :param name: name of the strategy behind choose_guess, part of the cache key
+        :param first_guess: index of the opening guess, None for default_first_guess
+        :param cache_dir: directory of the on-disk cache, None to always build in memory
+        """
+        self.feedback_table = feedback_table
+        if first_guess is None:
+            first_guess = default_first_guess(feedback_table.code_length, feedback_table.num_colours)
+        self.first_guess = first_guess
+
+        if cache_dir is None:
+            self.second_guesses = self.build(choose_guess)
+            return
+
+        path = self.cache_path(cache_dir, name)
+        if os.path.exists(path):
+            self.second_guesses = np.load(path)
+        else:
+            self.second_guesses = self.build(choose_guess)
+            atomic_save(path, lambda f: np.save(f, self.second_guesses))
+
+    def cache_path(self, cache_dir, name):
+        """
+        Returns the path of the cached book file, keyed by configuration, opening guess and strategy.
+
+        :param cache_dir: directory of the on-disk cache
+        :param name: name of the strategy
+        :return: path of the .npy file
+        """
+        return os.path.join(cache_dir, "opening_%dx%d_%d_%s.npy" % (
+            self.feedback_table.code_length, self.feedback_table.num_colours, self.first_guess, name))
+
+    def build(self, choose_guess):
+        """
+        Computes the second guess for every feedback to the first guess.
+
+        :param choose_guess: function mapping an array of candidate indices to the index of the guess to play
+        :return: numpy array of second guess indices, one per encoded feedback
+        """
+        feedback = self.feedback_table.row(self.first_guess)
+        second_guesses = np.full(num_feedbacks(self.feedback_table.code_length), -1, dtype=np.int64)
+        for f in np.unique(feedback):
+            second_guesses[f] = choose_guess(np.flatnonzero(feedback == f))
+        return second_guesses
+
+    def second_guess(self, feedback):
+        """
+        Returns the second guess for an encoded feedback to the first guess.
+
+        :param feedback: the encoded feedback
+        :return: index of the second guess
+        """
+        return self.second_guesses[feedback]
@@ -0,0 +1,267 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import collections
+import contextlib
+import cProfile
+import functools
+import io
+import pstats
+import time
+
+import telemetry
+
+# Spans timed by the game and the agents:
+#   player_construction    building the Player and its agent
+#   agent_function         the agent choosing a guess, everything below included
+#   filter_remaining_codes the agent filtering its candidates by the last feedback
+#   best_guess             the agent searching for its next guess
+#   score_guesses          the agent scoring a block of guesses
+#   evaluate_guess         the referee scoring a guess against the target
+# Counters:
+#   candidates_examined    candidates filtered by the last feedback
+#   feedback_evaluations   guess-against-code feedbacks computed or looked up
+SPANS = ['player_construction', 'agent_function', 'filter_remaining_codes', 'best_guess', 'score_guesses',
+         'evaluate_guess']
+COUNTERS = ['candidates_examined', 'feedback_evaluations']
+
+# Spans and counters are only recorded when profiling is on, otherwise every hook is a single check of
+# _enabled. They are recorded in the process they run in, so games played in worker processes are
+# not included.
+_enabled = False
+_turn = 0
+# _span_calls[name][turn] and _span_times[name][turn], turn 0 being outside of any game
+_span_calls = collections.defaultdict(lambda: collections.defaultdict(int))
+_span_times = collections.defaultdict(lambda: collections.defaultdict(float))
+# _counters[name][turn]
+_counters = collections.defaultdict(lambda: collections.defaultdict(int))
+
+# The cProfile capture of the games profile_games[0] to profile_games[1] inclusive
+_profile_games = None
+_profile_path = None
+_profiler = None
+_profiled_games = 0
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def configure(enabled, profile_games=None, profile_path=None):
+    """
+    Turns profiling on or off and clears everything recorded so far.
+
+    :param enabled: whether spans and counters are recorded
+    :param profile_games: a (first, last) pair of game numbers, counted from 0, played under cProfile,
+                          None to not run cProfile
+    :param profile_path: the file the cProfile statistics are dumped to, None to print the slowest functions
+    """
+    global _enabled, _turn, _profile_games, _profile_path, _profiler, _profiled_games
+    _enabled = enabled
+    _turn = 0
+    _span_calls.clear()
+    _span_times.clear()
+    _counters.clear()
+    _profile_games = None if profile_games is None else tuple(profile_games)
+    _profile_path = profile_path
+    _profiler = None
+    _profiled_games = 0
+
+
+def enabled():
+    """
+    Checks whether spans and counters are recorded.
+
+    :return: True if profiling is on
+    """
+    return _enabled
+
+
+def set_turn(turn):
+    """
+    Sets the turn the following spans and counters are recorded under.
+
+    :param turn: the number of the guess being chosen, from 1, 0 outside of games
+    """
+    global _turn
+    _turn = turn
+
+
+def record(name, seconds):
+    """
+    Adds one call of a span to the current turn.
+
+    :param name: one of SPANS
+    :param seconds: the time spent in the span
+    """
+    _span_calls[name][_turn] += 1
+    _span_times[name][_turn] += seconds
+
+
+class Span:
+    """
+    A context manager timing the code it wraps as a span of the current turn.
+
+    ...
+
+    Attributes
+    ----------
+    name : str
+        one of SPANS
+    start : float
+        the time.perf_counter() value on entering the span
+
+    Methods
+    -------
+    __enter__()
+        Starts the clock
+    __exit__(exc_type, exc_value, traceback)
+        Records the time spent in the span
+    """
+
+    def __init__(self, name):
+        """
+        :param name: one of SPANS
+        """
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name):
+    """
+    Returns a context manager timing a span, a shared no-op one when profiling is off.
+
+    :param name: one of SPANS
+    :return: the context manager
+    """
+    return Span(name) if _enabled else _NULL_SPAN
+
+
+def timed(name):
+    """
+    Decorates a function so that every call is timed as a span.
+
+    :param name: one of SPANS
+    :return: the decorator
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def count(name, amount=1):
+    """
+    Adds to a counter of the current turn.
+
+    :param name: one of COUNTERS
+    :param amount: the amount added
+    """
+    if _enabled:
+        _counters[name][_turn] += int(amount)
+
+
+def profiled_games(game, num_games):
+    """
+    Counts the games of a run of consecutive games that are in the profiled range.
+
+    :param game: the number of the first game, from 0
+    :param num_games: the number of games
+    :return: the number of profiled games among them
+    """
+    if _profile_games is None:
+        return 0
+    return max(min(game + num_games - 1, _profile_games[1]) - max(game, _profile_games[0]) + 1, 0)
+
+
+def start_game(game, num_games=1):
+    """
+    Starts or resumes the cProfile capture if the game is in the profiled range.
+
+    :param game: the number of the game, from 0, or of the first of the games played in lockstep
+    :param num_games: the number of games played in lockstep, captured if any of them is profiled
+    """
+    global _profiler
+    if profiled_games(game, num_games) == 0:
+        return
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+    _profiler.enable()
+
+
+def end_game(game, num_games=1):
+    """
+    Pauses the cProfile capture at the end of a profiled game and leaves the game's turns.
+
+    :param game: the number of the game, from 0, or of the first of the games played in lockstep
+    :param num_games: the number of games played in lockstep
+    """
+    global _turn, _profiled_games
+    _turn = 0
+    if _profiler is None or profiled_games(game, num_games) == 0:
+        return
+    _profiler.disable()
+    _profiled_games += num_games
+
+
+def active():
+    """
+    Checks whether anything is being recorded, spans and counters or a cProfile capture.
+
+    :return: True if there will be a report
+    """
+    return _enabled or _profile_games is not None
+
+
+def emit_report():
+    """
+    Emits everything recorded as a profile_report telemetry event, if anything is being recorded.
+    """
+    if active():
+        telemetry.emit('profile_report', **report())
+
+
+def report():
+    """
+    Returns everything recorded, as the fields of a profile_report telemetry event.
+
+    :return: a dictionary with the per-turn 'spans' as {name: {turn: [calls, seconds]}}, the per-turn
+             'counters' as {name: {turn: amount}} and the 'profile' text of the cProfile capture, None
+             if nothing was captured
+    """
+    spans = {name: {turn: [_span_calls[name][turn], _span_times[name][turn]] for turn in sorted(_span_calls[name])}
+             for name in SPANS if name in _span_calls}
+    counters = {name: dict(sorted(_counters[name].items())) for name in COUNTERS if name in _counters}
+    return {'spans': spans, 'counters': counters, 'profile': profile_text()}
+
+
+def profile_text(limit=20):
+    """
+    Dumps the cProfile capture to the profile path, or renders its slowest functions.
+
+    :param limit: the number of functions listed
+    :return: a summary of the capture, None if no game was captured
+    """
+    if _profiler is None or _profiled_games == 0:
+        return None
+    if _profile_path is not None:
+        _profiler.dump_stats(_profile_path)
+        return "cProfile of %d games written to %s" % (_profiled_games, _profile_path)
+    stream = io.StringIO()
+    pstats.Stats(_profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+    return "cProfile of %d games:\n%s" % (_profiled_games, stream.getvalue().strip('\n'))
@@ -4,12 +4,13 @@ __email__ = "leeja744@student.otago.ac.nz"
 
 import collections
 
-import numpy as np
-import itertools
 import random
-from collections import Counter
 import math
 
+import profiling
+import telemetry
+from feedback import code_to_array, consistent_mask, index_to_code, shared_code_space
+
 
 class MastermindAgent():
     """
@@ -43,26 +44,20 @@ class MastermindAgent():
         self.code_length = code_length
         self.colours = colours
         self.num_guesses = num_guesses
-        self.possible_codes_tuples = list(itertools.product(colours, repeat=code_length))
-        self.possible_codes_arrays = [np.array(inner_tuple) for inner_tuple in self.possible_codes_tuples]
-        self.copied_array = self.possible_codes_arrays[:]
+        # Shared read-only with every other agent of the configuration
+        self.all_codes, self.possible_codes, self.possible_codes_counts = shared_code_space(code_length,
+                                                                                            len(colours))
+        self.remaining_guesses = self.all_codes
         self.guesses_distribution = collections.defaultdict(int)
 
-    def match_feedback(self, code, last_guess, in_colour, in_place):
-        # Count the occurrences of each color in 'code' and 'last_guess'
-        code_counts = Counter(code)
-        last_guess_counts = Counter(last_guess)
-
-        # Calculate the overall number of in_place and in_colour colors
-        in_place_count = sum(1 for i in range(len(code)) if code[i] == last_guess[i])
-        in_colour_count = sum(min(code_counts[color], last_guess_counts[color]) for color in set(code))
-
-        # Return True if the calculated counts match the provided in_colour and in_place values, otherwise return False
-        return in_place_count == in_place and in_colour_count - in_place_count == in_colour
-
+    @profiling.timed('filter_remaining_codes')
     def filter_possible_codes(self, last_guess, in_colour, in_place):
-        self.copied_array = [code for code in self.copied_array if
-                             self.match_feedback(code, last_guess, in_colour, in_place)]
+        # Score the last guess against all remaining codes at once and keep the consistent ones
+        profiling.count('candidates_examined', len(self.remaining_guesses))
+        mask = consistent_mask(self.possible_codes[self.remaining_guesses], code_to_array(last_guess, self.colours),
+                               in_place, in_colour, len(self.colours),
+                               self.possible_codes_counts[self.remaining_guesses])
+        self.remaining_guesses = self.remaining_guesses[mask]
 
 
     def AgentFunction(self, percepts):
@@ -92,24 +87,26 @@ class MastermindAgent():
         # Create an list of colour caracters. Currently all the guesses are the first colour,
         # 'B' - probably good idea to replace this logic with a better guess
         if guess_counter == 0:
-            self.copied_array = self.possible_codes_arrays[:]
-            action = random.choice(self.copied_array)
+            self.remaining_guesses = self.all_codes
+            action = index_to_code(random.choice(self.remaining_guesses), self.colours, self.code_length)
             return action
         else:
             self.filter_possible_codes(last_guess, in_colour, in_place)
-            print("Possible Codes Remaining", len(self.copied_array))
+            telemetry.emit('candidates_filtered', turn=guess_counter, remaining=len(self.remaining_guesses))
 
-            action = random.choice(self.copied_array)
+            action = index_to_code(random.choice(self.remaining_guesses), self.colours, self.code_length)
 
             if in_place == 5:
                 # Update the guesses count only when the puzzle is solved
-                print("added to guesses!")
+                if telemetry.enabled():
+                    telemetry.emit('agent_message', text="added to guesses!")
                 # Update the guesses distribution dictionary
                 if guess_counter in self.guesses_distribution:
                     self.guesses_distribution[self.guess_counter] += 1
                 else:
                     self.guesses_distribution[self.guess_counter] = 1
 
-                print(self.guesses_distribution)
+                if telemetry.enabled():
+                    telemetry.emit('agent_message', text=str(self.guesses_distribution))
 
             return action
@@ -0,0 +1,166 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import numpy as np
+
+from feedback import partition_entropy
+
+# Number of guesses whose partition histograms are held in memory at once while scoring
+SCORE_BLOCK_GUESSES = 4096
+
+# Number of guesses scored between deadline checks when the turn has a time budget
+ANYTIME_BLOCK_GUESSES = 256
+
+# All scorers take a (G, num_feedbacks) array of partition sizes, one row per guess,
+# and return a (G,) array of scores where higher is better.
+
+
+def entropy_score(counts):
+    """
+    Scores guesses by the Shannon entropy of their feedback partition.
+
+    :param counts: a (G, num_feedbacks) array of partition sizes
+    :return: a (G,) array of entropies
+    """
+    return partition_entropy(counts)
+
+
+def minimax_score(counts):
+    """
+    Scores guesses by their worst-case partition size (Knuth's minimax), negated so
+    that the guess leaving the fewest codes in the worst case scores highest.
+
+    :param counts: a (G, num_feedbacks) array of partition sizes
+    :return: a (G,) array of negated largest partition sizes
+    """
+    return -np.max(counts, axis=-1).astype(np.float64)
+
+
+def expected_size_score(counts):
+    """
+    Scores guesses by the expected number of codes left after the feedback, negated.
+
+    :param counts: a (G, num_feedbacks) array of partition sizes
+    :return: a (G,) array of negated expected partition sizes
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    return -(counts ** 2).sum(axis=-1) / counts.sum(axis=-1)
+
+
+def most_parts_score(counts):
+    """
+    Scores guesses by the number of distinct feedbacks they can receive.
+
+    :param counts: a (G, num_feedbacks) array of partition sizes
+    :return: a (G,) array of non-empty partition counts
+    """
+    return np.count_nonzero(counts, axis=-1).astype(np.float64)
+
+
+# Bounds take a (G, code_length + 1) array of partition sizes by total matching pegs and the number
+# of feedbacks each total can split into (feedback.feedbacks_per_total), and return a (G,) array that
+# no guess with those total-match partitions can score above.
+
+
+def split_parts(counts, splits):
+    """
+    Returns the most non-empty feedback partitions each total-match partition can split into.
+
+    :param counts: a (G, code_length + 1) array of partition sizes by total matching pegs
+    :param splits: a (code_length + 1,) array of feedbacks per total
+    :return: a (G, code_length + 1) array
+    """
+    return np.minimum(counts, splits)
+
+
+def entropy_bound(counts, splits):
+    """
+    Bounds the entropy of the feedback partition: the entropy of the total-match partition plus,
+    for each of its parts, the entropy of an even split into as many feedbacks as it can take.
+
+    :param counts: a (G, code_length + 1) array of partition sizes by total matching pegs
+    :param splits: a (code_length + 1,) array of feedbacks per total
+    :return: a (G,) array of entropy bounds
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    parts = np.maximum(split_parts(counts, splits), 1)
+    probabilities = counts / counts.sum(axis=-1, keepdims=True)
+    return partition_entropy(counts) + (probabilities * np.log2(parts)).sum(axis=-1)
+
+
+def minimax_bound(counts, splits):
+    """
+    Bounds the negated largest feedback partition: a total-match partition split as evenly as
+    possible still leaves a part of ceil(size / parts) codes.
+
+    :param counts: a (G, code_length + 1) array of partition sizes by total matching pegs
+    :param splits: a (code_length + 1,) array of feedbacks per total
+    :return: a (G,) array of negated largest partition size bounds
+    """
+    parts = np.maximum(split_parts(counts, splits), 1)
+    return -np.max(-(-counts // parts), axis=-1).astype(np.float64)
+
+
+def expected_size_bound(counts, splits):
+    """
+    Bounds the negated expected partition size: a part of c codes split k ways contributes at
+    least c^2 / k to the sum of squared sizes.
+
+    :param counts: a (G, code_length + 1) array of partition sizes by total matching pegs
+    :param splits: a (code_length + 1,) array of feedbacks per total
+    :return: a (G,) array of negated expected partition size bounds
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    parts = np.maximum(split_parts(counts, splits), 1)
+    return -(counts ** 2 / parts).sum(axis=-1) / counts.sum(axis=-1)
+
+
+def most_parts_bound(counts, splits):
+    """
+    Bounds the number of non-empty feedback partitions.
+
+    :param counts: a (G, code_length + 1) array of partition sizes by total matching pegs
+    :param splits: a (code_length + 1,) array of feedbacks per total
+    :return: a (G,) array of partition count bounds
+    """
+    return split_parts(counts, splits).sum(axis=-1).astype(np.float64)
+
+
+SCORERS = {
+    'entropy': entropy_score,
+    'minimax': minimax_score,
+    'expected_size': expected_size_score,
+    'most_parts': most_parts_score,
+}
+
+SCORE_BOUNDS = {
+    'entropy': entropy_bound,
+    'minimax': minimax_bound,
+    'expected_size': expected_size_bound,
+    'most_parts': most_parts_bound,
+}
+
+
+def get_scorer(name):
+    """
+    Returns the scorer registered under a name.
+
+    :param name: one of the keys of SCORERS
+    :return: the scorer function
+    """
+    if name not in SCORERS:
+        raise RuntimeError("Error! Unknown guess scorer '%s' (valid scorers are %s)" % (name, list(SCORERS)))
+    return SCORERS[name]
+
+
+def get_score_bound(name):
+    """
+    Returns the upper bound of the scorer registered under a name.
+
+    :param name: one of the keys of SCORE_BOUNDS
+    :return: the bound function
+    """
+    if name not in SCORE_BOUNDS:
+        raise RuntimeError("Error! Unknown guess scorer '%s' (valid scorers are %s)" % (name, list(SCORE_BOUNDS)))
+    return SCORE_BOUNDS[name]
@@ -18,7 +18,61 @@ game_settings = {
 
    "verbose": True,
 
-   "seed": None            # seed for random choices of words in the game, None for random seed
+   "seed": None,           # seed for random choices of words in the game, None for random seed
+
+   "numberOfWorkers": 1,   # number of worker processes playing games in parallel, 1 to play in this process
+
+   "batchSimulation": False,  # play all games in lockstep through the agent's AgentFunctionBatch
+
+   "exhaustiveEvaluation": False,  # play every possible code once instead of totalNumberOfGames random ones
+
+   "telemetry": "text",    # where game and agent events go: "text" for the console, "jsonl" or "null"
+
+   "telemetryPath": None,  # file the jsonl events are appended to, None for standard output
+
+   "profiling": False,     # time the agents' and the referee's hot paths and count their work per turn
+
+   "profileGames": None,   # (first, last) game numbers, from 0, played under cProfile, None to not run cProfile
+
+   "profilePath": None,    # file the cProfile statistics are dumped to, None to print the slowest functions
+
+   "serverHost": "127.0.0.1",  # host solver_server.py listens on
+
+   "serverPort": 8343,     # TCP port solver_server.py listens on
+
+   "serverSocket": None,   # Unix socket path solver_server.py listens on instead of TCP, None for TCP
+
+   "serverWorkers": 1,     # number of processes solver_server.py searches for guesses in
+
+   "exactEntropy": True,   # score guesses against all remaining codes instead of a sample of 100
+
+   "guessScorer": "entropy",  # how guesses are scored: "entropy", "minimax", "expected_size" or "most_parts"
+
+   "openingBook": True,    # play the first two guesses from a precomputed opening book
+
+   "rankedFirstGuess": True,  # open with the best first guess from first_guess.py's ranking for the scorer
+
+   "guessPool": "candidates",  # guess only "candidates" still consistent with the feedback, or "all" codes
+
+   "lookaheadDepth": 1,    # plies of lookahead on the expected number of guesses, 1 to play the best scoring guess
+
+   "lookaheadWidth": 8,    # number of best scoring guesses searched at every ply of the lookahead
+
+   "lookaheadMemoSize": 2**16,  # number of sub-game values the lookahead keeps
+
+   "turnTimeBudget": None,  # seconds to choose a guess before playing the best one found so far, None for no limit
+
+   "decisionCacheSize": 2**16,  # number of game histories whose chosen guess is kept across games, 0 to disable
+
+   "symmetryReduction": True,  # score one guess per class of guesses equivalent under colour/position swaps
+
+   "partitionIndexSize": 32,  # number of guesses whose feedback partitions are kept as bitsets
+
+   "streamingThreshold": 2**20,  # code spaces larger than this are generated lazily in chunks
+
+   "codeChunkSize": 2**16,  # number of codes generated per chunk when streaming
+
+   "feedbackCacheDir": "feedback_cache"  # directory for cached feedback tables, None to disable caching
 
 }
 
@@ -0,0 +1,318 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import argparse
+import asyncio
+import concurrent.futures
+import itertools
+import json
+
+import numpy as np
+
+from feedback import encode_feedback, index_to_code, stream_consistent
+from my_agent import MastermindAgent
+from settings import game_settings
+
+# The protocol is one JSON object per line each way. Every request gets exactly one reply:
+#   {"op": "new"}                                          -> {"session": id, "guess": "BBRRG"}
+#   {"op": "feedback", "session": id, "in_place": p, "in_colour": c}
+#                                                          -> {"session": id, "guess": "...", "remaining": n}
+#                                                             or {"session": id, "solved": true} once solved
+#   {"op": "end", "session": id}                           -> {"session": id, "ended": true}
+# A request that cannot be served is answered with {"error": "Error! ..."}.
+OPS = ['new', 'feedback', 'end']
+
+# The solver of each executor process, built by init_solver
+_solver = None
+
+
+def init_solver(code_length, colours, num_guesses):
+    """
+    Builds the solver of an executor process.
+
+    :param code_length: the length of the code
+    :param colours: list of characters representing available colours
+    :param num_guesses: the max. number of guesses per game
+    """
+    global _solver
+    _solver = MastermindAgent(code_length, colours, num_guesses)
+
+
+def solve(history, candidates):
+    """
+    Searches for the best guess of a position in an executor process.
+
+    :param history: tuple of the (guess index, encoded feedback) of every guess so far
+    :param candidates: numpy array of the indices of the codes consistent with the history
+    :return: a tuple (guess, exact), exact being False if the search was cut short or sampled
+    """
+    guess = _solver.best_guess(history, candidates)
+    return int(guess), _solver.exact_entropy and not _solver.search_truncated
+
+
+def consistent_codes(history):
+    """
+    Finds the codes consistent with a history by streaming the code space, in an executor process.
+
+    :param history: tuple of the (guess index, encoded feedback) of every guess so far
+    :return: numpy array of the indices of consistent codes
+    """
+    return stream_consistent(_solver.code_length, len(_solver.colours), list(history), game_settings['codeChunkSize'])
+
+
+def index_dtype(num_codes):
+    """
+    Returns the smallest unsigned integer type holding every code index.
+
+    :param num_codes: the number of codes
+    :return: a numpy dtype
+    """
+    for dtype in (np.uint16, np.uint32):
+        if num_codes <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class Session:
+    """
+    The state of one game played through the server: the guesses and feedback so far and the codes
+    still consistent with them.
+
+    ...
+
+    Attributes
+    ----------
+    history : tuple
+        the (guess index, encoded feedback) of every guess answered so far
+    guess : int
+        index of the last guess sent, waiting for its feedback
+    candidates : numpy array or None
+        the indices of the codes consistent with history in the server's index_dtype, None before the
+        first feedback of a streaming configuration
+    """
+
+    __slots__ = ('history', 'guess', 'candidates')
+
+    def __init__(self, guess, candidates):
+        """
+        :param guess: index of the first guess
+        :param candidates: the indices of all codes, None for a streaming configuration
+        """
+        self.history = ()
+        self.guess = guess
+        self.candidates = candidates
+
+
+class SolverServer:
+    """
+    Plays many games at once, one session per game, for clients sending the feedback to its guesses.
+
+    Sessions are filtered in the event loop. Searches for a guess run in a pool of executor processes,
+    so a slow session never holds up the others. The opening book, the decision cache and positions
+    with a single candidate are answered without the executor.
+
+    ...
+
+    Attributes
+    ----------
+    solver : MastermindAgent
+        the solver of the event loop, used for its opening book, decision cache and feedback table
+    executor : ProcessPoolExecutor
+        the processes searching for guesses
+    sessions : dict
+        the Session of every session id
+    session_ids : iterator
+        the ids given to new sessions
+    dtype : numpy dtype
+        the type candidates are kept in, the smallest holding every code index
+    all_codes : numpy array or None
+        the indices of all codes every session starts from, None for a streaming configuration
+
+    Methods
+    -------
+    handle_client(reader, writer)
+        Serves the requests of one connection until it closes
+    handle(message, owned)
+        Returns the reply to a request
+    new_session()
+        Starts a session and returns its first guess
+    feedback(session_id, in_place, in_colour)
+        Records the feedback of a session's last guess and returns its next guess
+    next_guess(session)
+        Returns the next guess of a session
+    """
+
+    def __init__(self, code_length, colours, num_guesses, num_workers):
+        """
+        :param code_length: the length of the code
+        :param colours: list of characters representing available colours
+        :param num_guesses: the max. number of guesses per game
+        :param num_workers: the number of executor processes
+        """
+        self.solver = MastermindAgent(code_length, colours, num_guesses)
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=num_workers, initializer=init_solver,
+                                                               initargs=(code_length, colours, num_guesses))
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+        self.dtype = index_dtype(self.solver.feedback_table.num_codes)
+        self.all_codes = None if self.solver.streaming else self.solver.all_codes.astype(self.dtype)
+
+    async def handle_client(self, reader, writer):
+        """
+        Serves the requests of one connection until it closes, then ends the sessions it started.
+
+        :param reader: the asyncio StreamReader of the connection
+        :param writer: the asyncio StreamWriter of the connection
+        """
+        owned = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = await self.handle(json.loads(line), owned)
+                except (ValueError, KeyError, TypeError, RuntimeError) as e:
+                    reply = {'error': str(e) if str(e).startswith("Error!") else "Error! Bad request: %s" % e}
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in owned:
+                self.sessions.pop(session_id, None)
+            writer.close()
+
+    async def handle(self, message, owned):
+        """
+        Returns the reply to a request.
+
+        :param message: the decoded request
+        :param owned: the set of the ids of the sessions started by the connection, the only ones it can play
+        :return: the reply
+        """
+        op = message['op']
+        if op == 'new':
+            session_id, guess = self.new_session()
+            owned.add(session_id)
+            return {'session': session_id, 'guess': guess}
+
+        session_id = message['session']
+        if session_id not in owned:
+            raise RuntimeError("Error! Unknown session %s" % session_id)
+        if op == 'feedback':
+            reply = await self.feedback(session_id, int(message['in_place']), int(message['in_colour']))
+        elif op == 'end':
+            reply = {'ended': True}
+        else:
+            raise RuntimeError("Error! Unknown op '%s' (valid ops are %s)" % (op, OPS))
+        if 'guess' not in reply:
+            del self.sessions[session_id]
+            owned.discard(session_id)
+        return dict(reply, session=session_id)
+
+    def new_session(self):
+        """
+        Starts a session.
+
+        :return: a tuple (session id, first guess as a string of colours)
+        """
+        guess = self.solver.first_guess
+        if self.solver.opening_book is not None:
+            guess = self.solver.opening_book.first_guess
+        session_id = next(self.session_ids)
+        self.sessions[session_id] = Session(guess, self.all_codes)
+        return session_id, ''.join(index_to_code(guess, self.solver.colours, self.solver.code_length))
+
+    async def feedback(self, session_id, in_place, in_colour):
+        """
+        Records the feedback of a session's last guess and finds its next guess.
+
+        :param session_id: the id of the session
+        :param in_place: in-place count of the feedback
+        :param in_colour: in-colour count of the feedback
+        :return: the reply, without the session id
+        """
+        session = self.sessions[session_id]
+        code_length = self.solver.code_length
+        if in_place == code_length:
+            return {'solved': True}
+
+        feedback = encode_feedback(in_place, in_colour, code_length)
+        history = session.history + ((session.guess, feedback),)
+        if session.candidates is None:
+            candidates = await asyncio.get_running_loop().run_in_executor(self.executor, consistent_codes, history)
+            candidates = candidates.astype(self.dtype)
+        else:
+            feedbacks = self.solver.feedback_table.row(session.guess, session.candidates)
+            candidates = session.candidates[feedbacks == feedback]
+        # Impossible feedback leaves the session as it was, so the client can correct it
+        if len(candidates) == 0:
+            raise RuntimeError("Error! No code is consistent with the feedback of session %d" % session_id)
+
+        session.history, session.candidates = history, candidates
+        session.guess = await self.next_guess(session)
+        return {'guess': ''.join(index_to_code(session.guess, self.solver.colours, code_length)),
+                'remaining': len(session.candidates)}
+
+    async def next_guess(self, session):
+        """
+        Returns the next guess of a session, from the opening book or the decision cache if they have it,
+        otherwise from a search in the executor.
+
+        :param session: the Session
+        :return: index of the next guess
+        """
+        book = self.solver.opening_book
+        if len(session.history) == 1 and book is not None and session.history[0][0] == book.first_guess:
+            return int(book.second_guess(session.history[0][1]))
+        if len(session.candidates) == 1:
+            return int(session.candidates[0])
+
+        guess = self.solver.decision_cache.get(session.history)
+        if guess is not None:
+            return guess
+        guess, exact = await asyncio.get_running_loop().run_in_executor(self.executor, solve, session.history,
+                                                                        session.candidates.astype(np.int32))
+        if exact:
+            self.solver.decision_cache.put(session.history, guess)
+        return guess
+
+
+async def serve(server, host, port, socket_path):
+    """
+    Serves clients until cancelled.
+
+    :param server: the SolverServer
+    :param host: the TCP host
+    :param port: the TCP port
+    :param socket_path: path of a Unix socket to serve on instead of TCP, None for TCP
+    """
+    if socket_path is not None:
+        listener = await asyncio.start_unix_server(server.handle_client, path=socket_path)
+        print("Serving on %s" % socket_path)
+    else:
+        listener = await asyncio.start_server(server.handle_client, host, port)
+        print("Serving on %s:%d" % (host, port))
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Mastermind guesses to many concurrent game sessions.")
+    parser.add_argument("--host", default=game_settings['serverHost'])
+    parser.add_argument("--port", type=int, default=game_settings['serverPort'])
+    parser.add_argument("--socket", default=game_settings['serverSocket'], help="Unix socket path, TCP if omitted")
+    parser.add_argument("--workers", type=int, default=game_settings['serverWorkers'],
+                        help="processes searching for guesses")
+    args = parser.parse_args()
+
+    colours = ['B', 'R', 'G', 'Y', 'P', 'C'][:game_settings['numberOfColours']]
+    server = SolverServer(game_settings['codeLength'], colours, game_settings['maxNumberOfGuesses'], args.workers)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown()
@@ -0,0 +1,106 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import numpy as np
+
+from feedback import code_indices
+
+# Candidate sets smaller than this are scored in full, finding their symmetries costs more than it saves
+MIN_SYMMETRY_CANDIDATES = 64
+
+
+def merge_classes(classes, a, b):
+    """
+    Merges the classes holding a and b.
+
+    :param classes: list of sets partitioning the colours or positions
+    :param a: a member of one class
+    :param b: a member of another class
+    :return: the updated list of classes
+    """
+    class_a = next(c for c in classes if a in c)
+    class_b = next(c for c in classes if b in c)
+    if class_a is class_b:
+        return classes
+    return [c for c in classes if c is not class_a and c is not class_b] + [class_a | class_b]
+
+
+def symmetry_classes(codes, candidates, num_colours):
+    """
+    Finds the colours and the positions that can be swapped without changing the candidate set.
+
+    Every swap of two colours (or two positions) that maps the candidate set onto itself is a symmetry,
+    and so is every permutation generated by such swaps: colours (positions) in one class are
+    interchangeable.
+
+    :param codes: a (len(candidates), code_length) array of the candidates' colour indices
+    :param candidates: array of candidate code indices
+    :param num_colours: the number of colours
+    :return: a tuple (colour_classes, position_classes), each a list of sets
+    """
+    code_length = codes.shape[1]
+    sorted_candidates = np.sort(candidates)
+
+    def preserves(swapped):
+        swapped_indices = code_indices(swapped, num_colours)
+        found = np.searchsorted(sorted_candidates, swapped_indices)
+        found[found == len(sorted_candidates)] = 0
+        return np.all(sorted_candidates[found] == swapped_indices)
+
+    colour_classes = [{c} for c in range(num_colours)]
+    for a in range(num_colours):
+        for b in range(a + 1, num_colours):
+            if any(a in c and b in c for c in colour_classes):
+                continue
+            mapping = np.arange(num_colours, dtype=codes.dtype)
+            mapping[a], mapping[b] = b, a
+            if preserves(mapping[codes]):
+                colour_classes = merge_classes(colour_classes, a, b)
+
+    position_classes = [{p} for p in range(code_length)]
+    for i in range(code_length):
+        for j in range(i + 1, code_length):
+            if any(i in c and j in c for c in position_classes):
+                continue
+            order = np.arange(code_length)
+            order[i], order[j] = j, i
+            if preserves(codes[:, order]):
+                position_classes = merge_classes(position_classes, i, j)
+
+    return colour_classes, position_classes
+
+
+def orbit_representatives(codes, colour_classes, position_classes, num_colours):
+    """
+    Picks one guess from each class of guesses that are equivalent under the symmetries of the
+    candidate set. Equivalent guesses split the candidates into partitions of the same sizes, so only
+    the representatives need scoring.
+
+    Two guesses are equivalent when, colour class by colour class, they hold the same multiset of
+    per-position-class colour counts. The representative of a class is its first member, so taking the
+    first best-scoring representative gives the same guess as scoring every guess.
+
+    :param codes: a (G, code_length) array of the guesses' colour indices, a set closed under the symmetries
+    :param colour_classes: the interchangeable colours, from symmetry_classes
+    :param position_classes: the interchangeable positions, from symmetry_classes
+    :param num_colours: the number of colours
+    :return: sorted array of the positions in codes of the representatives
+    """
+    # Without a symmetry every guess is its own class, and the keys would cost a full sort to find that out
+    if len(colour_classes) == num_colours and len(position_classes) == codes.shape[1]:
+        return np.arange(len(codes))
+    code_length = codes.shape[1]
+
+    # counts[s, c] encodes how often colour c appears in each position class of guess s, one base
+    # (code_length + 1) digit per position class
+    counts = np.zeros((len(codes), num_colours), dtype=np.int64)
+    for k, positions in enumerate(position_classes):
+        class_codes = codes[:, sorted(positions)]
+        for c in range(num_colours):
+            counts[:, c] += (class_codes == c).sum(axis=1) * (code_length + 1) ** k
+
+    # Colours within a class are interchangeable, so only the sorted counts of the class matter
+    keys = np.concatenate([np.sort(counts[:, sorted(colours)], axis=1) for colours in colour_classes], axis=1)
+    _, first = np.unique(keys, axis=0, return_index=True)
+    return np.sort(first)
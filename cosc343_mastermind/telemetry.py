@@ -0,0 +1,418 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import json
+import sys
+import time
+
+import numpy as np
+
+# Events, each emitted with keyword fields:
+#   game_created         code_length, colours (only when the game is verbose)
+#   run_started          agent, num_guesses, games, num_workers and optionally seed, exhaustive, batch (only when
+#                        the game is verbose)
+#   game_started         game, num_games
+#   turn_played          game, turn, guess, in_place, in_colour, agent_time
+#   game_finished        game, score, guesses, solved, target, game_time
+#   run_progress         games, num_games, average_score and optionally average_time, total_time
+#   run_finished         games, score_occurrences and optionally average_score, worst_score, unsolved,
+#                        average_time, total_time, exhaustive, caches (cache.cache_stats of the agent)
+#   candidates_filtered  turn, remaining (emitted by agents)
+#   agent_message        text (emitted by agents, only when telemetry is enabled())
+#   profile_report       spans, counters, profile (emitted by profiling, only when it is on)
+EVENTS = ['game_created', 'run_started', 'game_started', 'turn_played', 'game_finished', 'run_progress',
+          'run_finished', 'candidates_filtered', 'agent_message', 'profile_report']
+
+
+class bcolors:
+    RED = '\033[1;30;41m'
+    GREEN = '\033[1;30;42m'
+    YELLOW = '\033[1;30;43m'
+    BLUE = '\033[1;30;44m'
+    PURPLE = '\033[1;30;45m'
+    CYAN = '\033[1;30;46m'
+    ENDC = '\033[0m'
+
+
+COLOUR_CODES = {'B': bcolors.BLUE, 'R': bcolors.RED, 'G': bcolors.GREEN, 'Y': bcolors.YELLOW, 'C': bcolors.CYAN,
+                'P': bcolors.PURPLE}
+
+
+def colour_char(c):
+    """
+    Renders a colour character on a background of its colour.
+
+    :param c: a colour character
+    :return: the character wrapped in ANSI colour codes, unchanged if it is not a colour
+    """
+    if c in COLOUR_CODES:
+        return "%s%c%s" % (COLOUR_CODES[c], c, bcolors.ENDC)
+    return "%c" % c
+
+
+def time_to_str(time_in_seconds):
+    """
+    Renders a duration in hours, minutes and seconds.
+
+    :param time_in_seconds: the duration
+    :return: the duration as text, e.g. "2 min, 5 s"
+    """
+    timeStr = ''
+    if time_in_seconds > 3600:
+        hours = int(np.floor(time_in_seconds / 3600))
+        timeStr += "%d h, " % hours
+        time_in_seconds %= 3600
+
+    if time_in_seconds > 60:
+        minutes = int(np.floor(time_in_seconds / 60))
+        timeStr += "%d min, " % minutes
+        time_in_seconds %= 60
+
+    if time_in_seconds < 1:
+        timeStr += "%.1f s" % time_in_seconds
+    else:
+        timeStr += "%d s" % time_in_seconds
+
+    return timeStr
+
+
+class NullSink:
+    """
+    A sink discarding every event.
+
+    ...
+
+    Attributes
+    ----------
+    enabled : bool
+        whether per-turn and per-game events are consumed, always False
+
+    Methods
+    -------
+    emit(event, fields)
+        Discards an event
+    flush()
+        Does nothing
+    close()
+        Does nothing
+    """
+
+    enabled = False
+
+    def emit(self, event, fields):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TextSink:
+    """
+    A sink rendering events as the console text of the game, buffered and written a chunk at a time.
+
+    ...
+
+    Attributes
+    ----------
+    stream : file
+        where the text is written
+    verbose : bool
+        whether turns and agent output are rendered, not only the run's progress
+    enabled : bool
+        whether per-turn and per-game events are consumed, only when verbose
+    flush_lines : int
+        the number of rendered events buffered before they are written, 1 to write every event at once
+    buffer : list of str
+        the rendered text not written yet
+
+    Methods
+    -------
+    emit(event, fields)
+        Renders an event into the buffer
+    render(event, fields)
+        Returns the text of an event
+    render_profile(fields)
+        Returns the text of a profile_report event
+    flush()
+        Writes the buffered text
+    close()
+        Writes the buffered text
+    """
+
+    def __init__(self, stream=None, verbose=False, flush_lines=256):
+        """
+        :param stream: where the text is written, None for standard output
+        :param verbose: whether turns and agent output are rendered
+        :param flush_lines: the number of rendered events buffered before they are written
+        """
+        self.stream = stream
+        self.verbose = verbose
+        self.enabled = verbose
+        self.flush_lines = flush_lines
+        self.buffer = []
+
+    def emit(self, event, fields):
+        """
+        Renders an event into the buffer, writing the buffer out when it is full or the run is over.
+
+        :param event: one of EVENTS
+        :param fields: dictionary of the event's fields
+        """
+        text = self.render(event, fields)
+        if text:
+            self.buffer.append(text)
+        if len(self.buffer) >= self.flush_lines or event == 'run_finished':
+            self.flush()
+
+    def render(self, event, fields):
+        """
+        Returns the text of an event, as the game printed it before.
+
+        :param event: one of EVENTS
+        :param fields: dictionary of the event's fields
+        :return: the text, empty if the event is not shown
+        """
+        if event == 'game_created':
+            return "Mastermind\n  Code length: %s\n      Colours: %s\n" % (fields['code_length'], fields['colours'])
+        if event == 'run_started':
+            if fields.get('exhaustive'):
+                lines = ["Exhaustive play:", "  Num guesses:      %d" % fields['num_guesses'],
+                         "  Num targets:      %d" % fields['games']]
+            else:
+                lines = ["Batch play:" if fields.get('batch') else "Game play:",
+                         "  Num guesses:      %d" % fields['num_guesses'],
+                         "  Num rounds:       %d" % fields['games']]
+            if fields.get('exhaustive') or fields['num_workers'] > 1:
+                lines.append("  Num workers:      %d" % fields['num_workers'])
+            return "\n".join(lines) + "\n"
+        if event == 'turn_played' and self.verbose:
+            return "Guess %2d:\r\n\u2713%d %s ?%d\n\r   " % (fields['turn'], fields['in_place'],
+                                                            ''.join(colour_char(c) for c in fields['guess']),
+                                                            fields['in_colour'])
+        if event == 'game_started' and self.verbose:
+            return "Round %d/%d\n" % (fields['game'] + 1, fields['num_games'])
+        if event == 'game_finished' and self.verbose:
+            if not fields['solved']:
+                return "The solution was: \n   %s\r\n" % ''.join(colour_char(c) for c in fields['target'])
+            if fields['guesses'] == 1:
+                return "Solved in 1 guess!\n"
+            return "Solved in %d guesses!\n" % fields['guesses']
+        if event in ('candidates_filtered', 'agent_message') and self.verbose:
+            if event == 'candidates_filtered':
+                return "Possible Codes Remaining: %d\n" % fields['remaining']
+            return "%s\n" % fields['text']
+        if event == 'run_progress':
+            lines = ["Average score after game %d: %.2f" % (fields['games'], fields['average_score'])]
+            if fields.get('average_time') is not None:
+                if fields['games'] < fields['num_games']:
+                    remaining = fields['average_time'] * (fields['num_games'] - fields['games'])
+                    lines.append("Average running time per game %s." % time_to_str(fields['average_time']))
+                    lines.append("Time remaining %s." % time_to_str(remaining))
+                    lines.append("Expected total running time %s." % time_to_str(fields['average_time'] *
+                                                                                fields['num_games']))
+                else:
+                    lines.append("Total running time %s." % time_to_str(fields['total_time']))
+            return "\n".join(lines) + "\n"
+        if event == 'profile_report':
+            return self.render_profile(fields)
+        if event == 'run_finished':
+            lines = []
+            if fields.get('exhaustive'):
+                lines.append("Average score over all %d targets: %.4f" % (fields['games'], fields['average_score']))
+                lines.append("Worst score: %d" % fields['worst_score'])
+                lines.append("Unsolved targets: %d" % fields['unsolved'])
+            elif fields.get('average_score') is not None:
+                lines.append("Average score after game %d: %.2f" % (fields['games'], fields['average_score']))
+            if fields.get('average_time') is not None:
+                lines.append("Average running time per game %s." % time_to_str(fields['average_time']))
+            if fields.get('total_time') is not None:
+                lines.append("Total running time %s." % time_to_str(fields['total_time']))
+            lines.append("Score Occurrences: %s" % fields['score_occurrences'])
+            for name, stats in fields.get('caches', {}).items():
+                if stats['hits'] + stats['misses'] > 0:
+                    lines.append("%s hit rate: %.1f%% (%d hits, %d misses, %d entries)" % (
+                        name.replace('_', ' ').capitalize(), stats['hit_rate'] * 100, stats['hits'], stats['misses'],
+                        stats['entries']))
+            return "\n".join(lines) + "\n"
+        return ""
+
+    def render_profile(self, fields):
+        """
+        Returns the text of a profile_report event: the total time of every span and the total of every
+        counter, one column per turn, turn 0 being outside of games.
+
+        :param fields: dictionary of the event's fields
+        :return: the text
+        """
+        rows = [(name, {turn: seconds * 1000 for turn, (_, seconds) in turns.items()}, "%.1f")
+                for name, turns in fields['spans'].items()]
+        rows += [(name, turns, "%d") for name, turns in fields['counters'].items()]
+        lines = []
+        if rows:
+            turns = sorted({turn for _, values, _ in rows for turn in values})
+            width = max(len(name) for name, _, _ in rows)
+            lines.append("Profile (span times in ms, per turn):")
+            lines.append("  %-*s" % (width, "") + "".join("%12s" % ("turn %d" % turn) for turn in turns))
+            for name, values, number_format in rows:
+                lines.append("  %-*s" % (width, name) + "".join(
+                    "%12s" % (number_format % values[turn] if turn in values else "") for turn in turns))
+        if fields['profile'] is not None:
+            lines.append(fields['profile'])
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def flush(self):
+        """
+        Writes the buffered text.
+        """
+        if self.buffer:
+            stream = sys.stdout if self.stream is None else self.stream
+            stream.write(''.join(self.buffer))
+            stream.flush()
+            self.buffer = []
+
+    def close(self):
+        """
+        Writes the buffered text.
+        """
+        self.flush()
+
+
+class JsonLinesSink:
+    """
+    A sink writing every event as one JSON object per line, buffered and written a chunk at a time.
+
+    ...
+
+    Attributes
+    ----------
+    enabled : bool
+        whether per-turn and per-game events are consumed, always True
+    path : str or None
+        the file the events are appended to, None for standard output
+    flush_lines : int
+        the number of events buffered before they are written
+    buffer : list of str
+        the encoded events not written yet
+
+    Methods
+    -------
+    emit(event, fields)
+        Encodes an event into the buffer
+    flush()
+        Writes the buffered events
+    close()
+        Writes the buffered events
+    """
+
+    enabled = True
+
+    def __init__(self, path=None, flush_lines=1024):
+        """
+        :param path: the file the events are appended to, None for standard output
+        :param flush_lines: the number of events buffered before they are written
+        """
+        self.path = path
+        self.flush_lines = flush_lines
+        self.buffer = []
+
+    def emit(self, event, fields):
+        """
+        Encodes an event, stamped with the wall-clock time, into the buffer, writing the buffer out
+        when it is full or the run is over.
+
+        :param event: one of EVENTS
+        :param fields: dictionary of the event's fields, JSON serialisable
+        """
+        self.buffer.append(json.dumps(dict(fields, event=event, time=time.time())))
+        if len(self.buffer) >= self.flush_lines or event == 'run_finished':
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered events.
+        """
+        if not self.buffer:
+            return
+        text = '\n'.join(self.buffer) + '\n'
+        self.buffer = []
+        if self.path is None:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        else:
+            with open(self.path, 'a') as f:
+                f.write(text)
+
+    def close(self):
+        """
+        Writes the buffered events.
+        """
+        self.flush()
+
+
+SINKS = ['null', 'text', 'jsonl']
+
+# The sink of this process, agents emit to it without holding a reference to the game
+_sink = NullSink()
+
+
+def make_sink(name, path=None, verbose=False):
+    """
+    Builds a sink by name.
+
+    :param name: one of SINKS
+    :param path: the file of the jsonl sink, None for standard output
+    :param verbose: whether the text sink renders turns and agent output, in which case it writes every event
+                    at once so that games can be followed as they are played
+    :return: the sink
+    """
+    if name == 'null':
+        return NullSink()
+    if name == 'text':
+        return TextSink(verbose=verbose, flush_lines=1 if verbose else 256)
+    if name == 'jsonl':
+        return JsonLinesSink(path)
+    raise RuntimeError("Error! Unknown telemetry sink '%s' (valid sinks are %s)" % (name, SINKS))
+
+
+def set_sink(sink):
+    """
+    Makes a sink the sink of this process, flushing the previous one.
+
+    :param sink: the new sink
+    """
+    global _sink
+    _sink.flush()
+    _sink = sink
+
+
+def get_sink():
+    """
+    Returns the sink of this process.
+
+    :return: the sink
+    """
+    return _sink
+
+
+def enabled():
+    """
+    Checks whether per-turn and per-game events are consumed, so that they are only built when used.
+    Run progress and results are always emitted.
+
+    :return: False if such events would be discarded
+    """
+    return _sink.enabled
+
+
+def emit(event, **fields):
+    """
+    Sends an event to the sink of this process.
+
+    :param event: one of EVENTS
+    :param fields: the event's fields
+    """
+    _sink.emit(event, fields)
@@ -0,0 +1,137 @@
+__author__ = "Jay Lee"
+__organization__ = "COSC343/AIML402, University of Otago"
+__email__ = "leeja744@student.otago.ac.nz"
+
+import os
+
+import numpy as np
+
+from decision_tree import compile_tree, load_tree, tree_cache_path
+from feedback import codes_from_indices, encode_feedback, index_to_code
+from first_guess import opening_guess
+from my_agent import MastermindAgent as StrategyAgent, strategy_name
+from settings import game_settings
+
+
+class MastermindAgent():
+    """
+    A class that encapsulates the code dictating the
+    behaviour of the agent playing the game of Mastermind.
+
+    The agent plays my_agent's strategy from a compiled decision tree, so a turn
+    is a single table lookup.
+
+    ...
+
+    Attributes
+    ----------
+    code_length: int
+        the length of the code to guess
+    colours : list of char
+        a list of colours represented as characters
+    num_guesses : int
+        the max. number of guesses per game
+    tree : DecisionTree
+        the compiled strategy
+    node : int
+        the tree node of the current guess
+    batch_nodes : numpy array
+        the tree node of the current guess of every game played in lockstep
+
+    Methods
+    -------
+    load_or_compile_tree()
+        Loads the cached decision tree, compiling and saving it first if needed
+    AgentFunction(percepts)
+        Returns the next guess of the colours on the board
+    AgentFunctionBatch(percepts)
+        Returns the next guesses of many games played in lockstep
+    """
+
+    def __init__(self, code_length, colours, num_guesses):
+        """
+        :param code_length: the length of the code to guess
+        :param colours: list of letter representing colours used to play
+        :param num_guesses: the max. number of guesses per game
+        """
+        self.code_length = code_length
+        self.colours = colours
+        self.num_guesses = num_guesses
+        self.tree = self.load_or_compile_tree()
+        self.node = 0
+        self.batch_nodes = None
+
+    def load_or_compile_tree(self):
+        """
+        Loads the cached decision tree, compiling my_agent's strategy and saving it first if needed.
+
+        :return: the DecisionTree
+        """
+        cache_dir = game_settings['feedbackCacheDir']
+        first_guess = opening_guess(self.code_length, self.colours)
+        if cache_dir is not None:
+            path = tree_cache_path(cache_dir, self.code_length, len(self.colours), first_guess, strategy_name())
+            if os.path.exists(path):
+                return load_tree(path)
+
+        strategy = StrategyAgent(self.code_length, self.colours, self.num_guesses)
+        tree = compile_tree(strategy.feedback_table, strategy.choose_guess, first_guess)
+        if cache_dir is not None:
+            tree.save(path)
+        return tree
+
+    def AgentFunction(self, percepts):
+        """Returns the next board guess given state of the game in percepts
+
+              :param percepts: a tuple of four items: guess_counter, last_guess, in_place, in_colour
+
+                       , where
+
+                       guess_counter - is an integer indicating how many guesses have been made, starting with 0 for
+                                       initial guess;
+
+                       last_guess - is a num_rows x num_cols structure with the copy of the previous guess
+
+                       in_place - is the number of character in the last guess of correct colour and position
+
+                       in_colour - is the number of characters in the last guess of correct colour but not in the
+                                   correct position
+
+              :return: list of chars - a list of code_length chars constituting the next guess
+              """
+
+        guess_counter, last_guess, in_place, in_colour = percepts
+
+        if guess_counter == 0:
+            self.node = 0
+        else:
+            self.node = self.tree.next_node(self.node, encode_feedback(in_place, in_colour, self.code_length))
+            if self.node < 0:
+                raise RuntimeError("Error! Feedback (%d, %d) is not consistent with the previous guesses"
+                                   % (in_place, in_colour))
+
+        return index_to_code(self.tree.guesses[self.node], self.colours, self.code_length)
+
+    def AgentFunctionBatch(self, percepts):
+        """
+        Returns the next guesses of many games played in lockstep, walking all of them down the tree
+        at once. Games solved by their last guess are dropped from the batch.
+
+        :param percepts: a tuple (guess_counter, last_guesses, in_place, in_colour), last_guesses being a
+                         (G, code_length) array of colour indices and in_place, in_colour arrays of G counts
+        :return: a (g, code_length) uint8 array of the colour indices of the next guesses of the g games
+                 not solved by their last guess, in the order of the percepts
+        """
+        guess_counter, last_guesses, in_place, in_colour = percepts
+
+        if guess_counter == 0:
+            self.batch_nodes = np.zeros(len(last_guesses), dtype=np.int64)
+        else:
+            in_place = np.asarray(in_place)
+            playing = in_place != self.code_length
+            feedback = in_place[playing] * (self.code_length + 1) + np.asarray(in_colour)[playing]
+            self.batch_nodes = self.tree.children[self.batch_nodes[playing], feedback]
+            if np.any(self.batch_nodes < 0):
+                raise RuntimeError("Error! Feedback is not consistent with the previous guesses")
+
+        return codes_from_indices(self.tree.guesses[self.batch_nodes], self.code_length, len(self.colours))